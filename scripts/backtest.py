@@ -5,7 +5,9 @@ Run backtests on historical data to validate strategies
 """
 import sys
 import asyncio
+import threading
 from datetime import datetime, timedelta
+import numpy as np
 import pandas as pd
 from loguru import logger
 
@@ -17,6 +19,23 @@ from src.data_ingestion.market_data import MarketDataIngestion
 from src.storage.feature_store import FeatureStore
 from src.backtesting.backtest_engine import BacktestEngine, generate_signals_from_strategy
 from src.ml.signal_generator import SignalGenerator
+from src.utils.njit import njit
+
+OHLCV_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+_feature_store = None
+_feature_store_lock = threading.Lock()
+
+
+def get_feature_store() -> FeatureStore:
+    """Return the shared FeatureStore, initializing it on first use"""
+    global _feature_store
+    # Signals are computed in worker threads: guard the lazy init
+    with _feature_store_lock:
+        if _feature_store is None:
+            _feature_store = FeatureStore()
+            _feature_store.initialize()
+    return _feature_store
 
 
 async def fetch_historical_data(symbol: str, days: int = 90):
@@ -35,42 +54,52 @@ async def fetch_historical_data(symbol: str, days: int = 90):
         logger.error(f"No data fetched for {symbol}")
         return None
     
-    # Convert to DataFrame
-    df = pd.DataFrame(ohlcv)
-    df.set_index('datetime', inplace=True)
-    df = df[['open', 'high', 'low', 'close', 'volume']]
+    # Convert to DataFrame: fill one preallocated array per column in a single
+    # pass instead of letting pandas infer columns from a list of dicts
+    n = len(ohlcv)
+    index = np.empty(n, dtype='datetime64[us]')
+    columns = {column: np.empty(n, dtype=np.float64) for column in OHLCV_COLUMNS}
+    for i, candle in enumerate(ohlcv):
+        index[i] = candle['datetime']
+        for column, values in columns.items():
+            values[i] = candle[column]
+    
+    df = pd.DataFrame(columns, index=pd.DatetimeIndex(index, name='datetime'))
     
     logger.info(f"Fetched {len(df)} candles")
     return df
 
 
+@njit(cache=True)
+def _rsi_macd_signals(rsi, macd, macd_signal):
+    """Single pass over the indicators producing entry/exit flags"""
+    n = rsi.shape[0]
+    entry = np.zeros(n, dtype=np.bool_)
+    exit_ = np.zeros(n, dtype=np.bool_)
+    
+    for i in range(1, n):
+        bull_cross = macd[i] > macd_signal[i] and macd[i - 1] <= macd_signal[i - 1]
+        bear_cross = macd[i] < macd_signal[i] and macd[i - 1] >= macd_signal[i - 1]
+        
+        # Entry: RSI oversold + MACD bullish crossover
+        entry[i] = rsi[i] < 35 and bull_cross
+        # Exit: RSI overbought or MACD bearish crossover
+        exit_[i] = rsi[i] > 70 or bear_cross
+    
+    return entry, exit_
+
+
 def generate_strategy_signals(df: pd.DataFrame):
     """
     Generate trading signals from strategy
     Returns DataFrame with 'entry' and 'exit' boolean columns
     """
     # Compute technical indicators
-    feature_store = FeatureStore()
-    feature_store.initialize()
-    df = feature_store.compute_technical_features(df)
-    
-    # Generate signals based on indicators
-    entry_signals = pd.Series(False, index=df.index)
-    exit_signals = pd.Series(False, index=df.index)
+    df = get_feature_store().compute_technical_features(df)
     
     # Example strategy: RSI + MACD crossover
-    for i in range(1, len(df)):
-        # Entry: RSI oversold + MACD bullish crossover
-        if (df['rsi'].iloc[i] < 35 and 
-            df['macd'].iloc[i] > df['macd_signal'].iloc[i] and
-            df['macd'].iloc[i-1] <= df['macd_signal'].iloc[i-1]):
-            entry_signals.iloc[i] = True
-        
-        # Exit: RSI overbought or MACD bearish crossover
-        if (df['rsi'].iloc[i] > 70 or
-            (df['macd'].iloc[i] < df['macd_signal'].iloc[i] and
-             df['macd'].iloc[i-1] >= df['macd_signal'].iloc[i-1])):
-            exit_signals.iloc[i] = True
+    values = np.ascontiguousarray(df[['rsi', 'macd', 'macd_signal']].to_numpy(dtype=np.float64))
+    entry_signals, exit_signals = _rsi_macd_signals(values[:, 0], values[:, 1], values[:, 2])
     
     signals = pd.DataFrame(index=df.index)
     signals['entry'] = entry_signals
@@ -88,21 +117,27 @@ async def run_backtest(symbol: str, days: int = 90):
     
     if df is None or df.empty:
         logger.error("No data available for backtesting")
-        return
+        return None
     
-    # Generate signals
+    # Signals + simulation are CPU-bound: keep them off the event loop
+    return await asyncio.to_thread(_backtest_dataframe, df, symbol)
+
+
+def _backtest_dataframe(df: pd.DataFrame, symbol: str):
+    """Generate signals and run the backtest engine on fetched data"""
     signals = generate_strategy_signals(df)
     
-    # Run backtest
     backtest_engine = BacktestEngine(
         initial_capital=100000.0,
         commission=0.001,  # 0.1%
         slippage=0.001
     )
     
-    results = backtest_engine.run_backtest(df, signals, symbol)
-    
-    # Print results
+    return backtest_engine.run_backtest(df, signals, symbol)
+
+
+def print_results(symbol: str, results: dict):
+    """Print backtest results for a symbol"""
     print("\n" + "="*60)
     print(f"BACKTEST RESULTS: {symbol}")
     print("="*60)
@@ -147,8 +182,14 @@ async def main():
     print("CRYPTO TRADING BOT - BACKTESTING")
     print("="*60)
     
-    for symbol in symbols:
-        await run_backtest(symbol, days=90)
+    # Symbols are independent: fetch and backtest them concurrently
+    all_results = await asyncio.gather(
+        *[run_backtest(symbol, days=90) for symbol in symbols]
+    )
+    
+    for symbol, results in zip(symbols, all_results):
+        if results is not None:
+            print_results(symbol, results)
         print("\n")
 
 
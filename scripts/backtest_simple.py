@@ -3,20 +3,80 @@
 Script de backtesting simplifié
 Utilise les données historiques téléchargées
 """
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
 from pathlib import Path
 import pandas as pd
 import numpy as np
 from loguru import logger
 
+# Polars reste optionnel : sans lui, lecture CSV par pandas
+try:
+    import polars as pl
+except ImportError:  # pragma: no cover - dépend de l'environnement
+    pl = None
+
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.config import settings
+from src.utils.njit import NUMBA_AVAILABLE, njit
+
+
+# float32 suffit pour les prix/volumes et indicateurs (6-7 chiffres significatifs)
+# et divise par deux la bande passante ; les calculs de capital restent en float64
+OHLCV_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+OHLCV_DTYPE = np.float32
+
+
+def _read_csv(csv_path: Path) -> pd.DataFrame:
+    """Parser un CSV OHLCV avec Polars (multi-thread), pandas en secours"""
+    if pl is not None:
+        try:
+            df = (
+                pl.read_csv(csv_path, try_parse_dates=True)
+                .with_columns(pl.col(list(OHLCV_COLUMNS)).cast(pl.Float32))
+                .to_pandas()
+            )
+            return df.set_index('datetime')
+        except Exception as e:
+            logger.debug(f"Lecture Polars impossible ({csv_path}): {e}")
+    
+    return pd.read_csv(
+        csv_path, index_col='datetime', parse_dates=True,
+        dtype={column: OHLCV_DTYPE for column in OHLCV_COLUMNS}
+    )
+
+
+@lru_cache(maxsize=64)
+def _load_cached(filepath: str, mtime: float) -> pd.DataFrame:
+    """
+    Lire un fichier historique (mémoïsé par chemin + mtime)
+    Le CSV est converti une fois en Parquet, relu directement ensuite
+    """
+    csv_path = Path(filepath)
+    parquet_path = csv_path.with_suffix('.parquet')
+    
+    if parquet_path.exists() and parquet_path.stat().st_mtime >= mtime:
+        try:
+            return pd.read_parquet(parquet_path)
+        except Exception as e:
+            logger.warning(f"Lecture Parquet impossible ({parquet_path}): {e}")
+    
+    df = _read_csv(csv_path)
+    
+    try:
+        df.to_parquet(parquet_path)
+    except Exception as e:
+        logger.debug(f"Cache Parquet non écrit ({parquet_path}): {e}")
+    
+    return df
 
 
 def load_historical_data(symbol: str, timeframe: str = '1h'):
-    """Charger les données historiques depuis CSV"""
+    """Charger les données historiques depuis CSV (cache Parquet + mémoire)"""
     data_dir = Path('data/historical')
     filename = f"{symbol.replace('/', '_')}_{timeframe}.csv"
     filepath = data_dir / filename
@@ -25,33 +85,158 @@ def load_historical_data(symbol: str, timeframe: str = '1h'):
         logger.error(f"Fichier non trouvé: {filepath}")
         return None
     
-    df = pd.read_csv(filepath, index_col='datetime', parse_dates=True)
+    # astype renvoie une copie : calculate_indicators modifie le DataFrame en place
+    df = _load_cached(str(filepath), filepath.stat().st_mtime)
+    df = df.astype({column: OHLCV_DTYPE for column in OHLCV_COLUMNS if column in df.columns})
     logger.info(f"✅ Chargé {len(df)} bougies pour {symbol} ({timeframe})")
     return df
 
 
+@njit(cache=True)
+def _fused_indicators(close):
+    """
+    SMA 20/50, RSI 14, MACD 12/26/9, retours et volatilité 20 en une seule passe
+    Chaque barre de `close` est lue une fois, les sorties écrites une fois
+    """
+    n = close.shape[0]
+    sma_20 = np.full(n, np.nan, dtype=close.dtype)
+    sma_50 = np.full(n, np.nan, dtype=close.dtype)
+    rsi = np.full(n, np.nan, dtype=close.dtype)
+    macd = np.empty(n, dtype=close.dtype)
+    signal = np.empty(n, dtype=close.dtype)
+    returns = np.full(n, np.nan, dtype=close.dtype)
+    volatility = np.full(n, np.nan, dtype=close.dtype)
+    if n == 0:
+        return sma_20, sma_50, rsi, macd, signal, returns, volatility
+    
+    alpha_fast = 2.0 / (12 + 1)
+    alpha_slow = 2.0 / (26 + 1)
+    alpha_signal = 2.0 / (9 + 1)
+    
+    # SMA : somme glissante, remise à zéro sur NaN
+    sum_20 = 0.0
+    run_20 = 0
+    sum_50 = 0.0
+    run_50 = 0
+    
+    # RSI : sommes glissantes des gains/pertes sur 14 barres
+    gains = np.zeros(n)
+    losses = np.zeros(n)
+    sum_gain = 0.0
+    sum_loss = 0.0
+    
+    # MACD : trois EMA (adjust=False)
+    ema_fast = close[0]
+    ema_slow = close[0]
+    
+    # Volatilité : variance de Welford sur 20 retours
+    vol_count = 0
+    vol_mean = 0.0
+    vol_m2 = 0.0
+    
+    for i in range(n):
+        x = close[i]
+        
+        # SMA 20 / 50
+        if np.isnan(x):
+            sum_20 = 0.0
+            run_20 = 0
+            sum_50 = 0.0
+            run_50 = 0
+        else:
+            sum_20 += x
+            run_20 += 1
+            if run_20 > 20:
+                sum_20 -= close[i - 20]
+            if run_20 >= 20:
+                sma_20[i] = sum_20 / 20
+            sum_50 += x
+            run_50 += 1
+            if run_50 > 50:
+                sum_50 -= close[i - 50]
+            if run_50 >= 50:
+                sma_50[i] = sum_50 / 50
+        
+        # MACD + ligne de signal
+        if i > 0:
+            if np.isnan(x):
+                pass
+            elif np.isnan(ema_fast):
+                ema_fast = x
+                ema_slow = x
+            else:
+                ema_fast += alpha_fast * (x - ema_fast)
+                ema_slow += alpha_slow * (x - ema_slow)
+        m = ema_fast - ema_slow
+        macd[i] = m
+        if i == 0 or np.isnan(signal[i - 1]):
+            signal[i] = m
+        elif np.isnan(m):
+            signal[i] = signal[i - 1]
+        else:
+            signal[i] = signal[i - 1] + alpha_signal * (m - signal[i - 1])
+        
+        if i == 0:
+            continue
+        
+        # RSI
+        delta = x - close[i - 1]
+        if delta > 0:
+            gains[i] = delta
+        elif delta < 0:
+            losses[i] = -delta
+        sum_gain += gains[i]
+        sum_loss += losses[i]
+        if i >= 14:
+            sum_gain -= gains[i - 14]
+            sum_loss -= losses[i - 14]
+        if i >= 13:
+            if sum_loss > 0:
+                rsi[i] = 100.0 - 100.0 / (1.0 + sum_gain / sum_loss)
+            elif sum_gain > 0:
+                rsi[i] = 100.0
+        
+        # Retours + volatilité
+        returns[i] = x / close[i - 1] - 1.0
+        r = returns[i]
+        if np.isnan(r):
+            vol_count = 0
+            vol_mean = 0.0
+            vol_m2 = 0.0
+            continue
+        if vol_count < 20:
+            vol_count += 1
+            d = r - vol_mean
+            vol_mean += d / vol_count
+            vol_m2 += d * (r - vol_mean)
+        else:
+            old = returns[i - 20]
+            d = r - old
+            old_mean = vol_mean
+            vol_mean += d / 20
+            vol_m2 += d * (r - vol_mean + old - old_mean)
+        if vol_count == 20:
+            volatility[i] = np.sqrt(max(vol_m2, 0.0) / 19)
+    
+    return sma_20, sma_50, rsi, macd, signal, returns, volatility
+
+
+def _simple_returns(close):
+    """Retours simples close[i] / close[i-1] - 1 (NaN sur la première barre)"""
+    returns = np.empty_like(close)
+    returns[0:1] = np.nan
+    np.divide(close[1:], close[:-1], out=returns[1:])
+    returns[1:] -= 1.0
+    return returns
+
+
 def calculate_indicators(df):
     """Calculer des indicateurs techniques simples"""
-    # SMA (Simple Moving Average)
-    df['sma_20'] = df['close'].rolling(window=20).mean()
-    df['sma_50'] = df['close'].rolling(window=50).mean()
-    
-    # RSI (Relative Strength Index)
-    delta = df['close'].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-    rs = gain / loss
-    df['rsi'] = 100 - (100 / (1 + rs))
-    
-    # MACD
-    exp1 = df['close'].ewm(span=12, adjust=False).mean()
-    exp2 = df['close'].ewm(span=26, adjust=False).mean()
-    df['macd'] = exp1 - exp2
-    df['signal'] = df['macd'].ewm(span=9, adjust=False).mean()
-    
-    # Volatilité
-    df['returns'] = df['close'].pct_change()
-    df['volatility'] = df['returns'].rolling(window=20).std()
+    close = np.ascontiguousarray(df['close'].to_numpy())
+    
+    # SMA 20/50, RSI, MACD, signal, retours et volatilité : un seul kernel fusionné
+    (df['sma_20'], df['sma_50'], df['rsi'], df['macd'], df['signal'],
+     df['returns'], df['volatility']) = _fused_indicators(close)
     
     return df
 
@@ -79,59 +264,157 @@ def generate_signals(df):
     signals.loc[buy_signal, 'position'] = 1
     signals.loc[sell_signal, 'position'] = -1
     
-    # Forward fill pour maintenir la position
-    signals['position'] = signals['position'].replace(0, np.nan).fillna(method='ffill').fillna(0)
+    # Forward fill pour maintenir la position (numpy, sans Series intermédiaires)
+    raw = signals['position'].to_numpy()
+    idx = np.where(raw != 0, np.arange(len(raw)), 0)
+    np.maximum.accumulate(idx, out=idx)
+    position = raw[idx].astype(float)
+    signals['position'] = position
     
     return signals
 
 
-def backtest_strategy(df, signals, initial_capital=10000, commission=0.0021):
-    """Backtester la stratégie"""
-    positions = pd.DataFrame(index=signals.index)
-    positions['position'] = signals['position']
+@njit(cache=True)
+def _backtest_core(returns, pos, initial_capital, commission):
+    """
+    Boucle barre par barre du backtest
+    Point d'extension pour la logique dépendante du chemin (stop-loss, trailing, sizing)
+    """
+    n = returns.shape[0]
+    strategy_returns = np.full(n, np.nan)
+    equity = np.full(n, np.nan)
+    eq = initial_capital
+    running_max = initial_capital
+    max_drawdown = 0.0
     
-    # Calculer les retours
-    positions['returns'] = df['close'].pct_change()
-    positions['strategy_returns'] = positions['position'].shift(1) * positions['returns']
+    for i in range(1, n):
+        # Retour de la position tenue ; frais uniquement sur les barres de changement
+        r = pos[i - 1] * returns[i]
+        if pos[i] != pos[i - 1]:
+            r -= abs(pos[i] - pos[i - 1]) * commission
+        strategy_returns[i] = r
+        eq *= 1.0 + r
+        equity[i] = eq
+        
+        if i == 1 or eq > running_max:
+            running_max = eq
+        drawdown = (eq - running_max) / running_max
+        if drawdown < max_drawdown:
+            max_drawdown = drawdown
     
-    # Appliquer les frais de transaction (quand position change)
-    position_changes = positions['position'].diff().abs()
-    positions['strategy_returns'] = positions['strategy_returns'] - (position_changes * commission)
+    return strategy_returns, equity, max_drawdown
+
+
+def backtest_strategy(df, signals, initial_capital=10000, commission=0.0021, include_positions=False):
+    """
+    Backtester la stratégie (calculs de capital en float64)
+    Le DataFrame `positions` (pour les graphiques) n'est construit que si include_positions=True
+    """
+    close = df['close'].to_numpy(dtype=np.float64)
+    pos = signals['position'].to_numpy(dtype=np.float64)
     
-    # Calculer la valeur du portfolio
-    positions['equity'] = initial_capital * (1 + positions['strategy_returns']).cumprod()
+    # Calculer les retours (la première barre n'a pas de retour)
+    returns = _simple_returns(close)
+    
+    # Retours de la stratégie, valeur du portfolio et drawdown maximum
+    strategy_returns, equity, max_drawdown = _backtest_core(
+        returns, pos, float(initial_capital), float(commission)
+    )
+    max_drawdown *= 100
     
     # Métriques
-    total_return = (positions['equity'].iloc[-1] / initial_capital - 1) * 100
+    total_return = (equity[-1] / initial_capital - 1) * 100
     
     # Nombre de trades
-    num_trades = (positions['position'].diff() != 0).sum()
-    
-    # Drawdown maximum
-    running_max = positions['equity'].expanding().max()
-    drawdown = (positions['equity'] - running_max) / running_max
-    max_drawdown = drawdown.min() * 100
+    num_trades = int(np.count_nonzero(np.diff(pos)))
     
     # Sharpe ratio (annualisé)
-    sharpe_ratio = (positions['strategy_returns'].mean() / positions['strategy_returns'].std()) * np.sqrt(365 * 24)  # pour hourly
+    sharpe_ratio = (strategy_returns[1:].mean() / strategy_returns[1:].std(ddof=1)) * np.sqrt(365 * 24)  # pour hourly
     
     # Win rate
-    winning_trades = positions[positions['strategy_returns'] > 0]['strategy_returns']
-    losing_trades = positions[positions['strategy_returns'] < 0]['strategy_returns']
-    win_rate = len(winning_trades) / (len(winning_trades) + len(losing_trades)) * 100 if (len(winning_trades) + len(losing_trades)) > 0 else 0
+    winning_trades = int(np.count_nonzero(strategy_returns[1:] > 0))
+    losing_trades = int(np.count_nonzero(strategy_returns[1:] < 0))
+    win_rate = winning_trades / max(winning_trades + losing_trades, 1) * 100
     
     return {
         'initial_capital': initial_capital,
-        'final_equity': positions['equity'].iloc[-1],
+        'final_equity': equity[-1],
         'total_return': total_return,
         'num_trades': num_trades,
         'max_drawdown': max_drawdown,
         'sharpe_ratio': sharpe_ratio,
         'win_rate': win_rate,
-        'positions': positions
+        'positions': pd.DataFrame({
+            'position': pos,
+            'returns': returns,
+            'strategy_returns': strategy_returns,
+            'equity': equity,
+        }, index=signals.index) if include_positions else None
     }
 
 
+def _warmup_kernels():
+    """
+    Spécialiser les kernels njit pour les types rencontrés (float32/float64,
+    tableaux modifiables ou en lecture seule comme ceux renvoyés par pandas)
+    Avec cache=True la compilation n'a lieu qu'une fois puis est relue du disque.
+    Les workers du ProcessPoolExecutor héritent des kernels chargés avec fork ;
+    avec spawn (macOS, Windows) ils réimportent le module et relisent ce cache
+    
+    Un échec (compilation, typage) est journalisé sans bloquer l'import : les
+    kernels seront alors compilés au premier appel
+    """
+    try:
+        for readonly in (False, True):
+            for dtype in (np.float32, np.float64):
+                close = np.linspace(1.0, 2.0, 64).astype(dtype)
+                close.flags.writeable = not readonly
+                _fused_indicators(close)
+            
+            returns = np.zeros(64)
+            pos = np.zeros(64)
+            pos.flags.writeable = not readonly
+            _backtest_core(returns, pos, 10000.0, 0.001)
+    except Exception as e:
+        logger.warning(f"⚠️ Préchauffage numba impossible ({e}), compilation au premier appel")
+
+
+if NUMBA_AVAILABLE and os.getenv('BACKTEST_NUMBA_WARMUP', '1') != '0':
+    _warmup_kernels()
+
+
+def _run_one(symbol: str, timeframe: str, initial_capital: float, commission: float):
+    """Backtester un symbole (charger → indicateurs → signaux → backtest)"""
+    df = load_historical_data(symbol, timeframe)
+    if df is None or df.empty:
+        return None
+    
+    df = calculate_indicators(df)
+    signals = generate_signals(df)
+    return backtest_strategy(df, signals, initial_capital, commission)
+
+
+def log_results(symbol: str, results: dict):
+    """Afficher les résultats d'un symbole"""
+    logger.info(f"📈 Résultats pour {symbol}:")
+    logger.info("-" * 70)
+    logger.info(f"   Capital initial:    {results['initial_capital']:>12,.2f}€")
+    logger.info(f"   Capital final:      {results['final_equity']:>12,.2f}€")
+    
+    if results['total_return'] >= 0:
+        logger.success(f"   Rendement total:    {results['total_return']:>12.2f}%  ✅")
+    else:
+        logger.error(f"   Rendement total:    {results['total_return']:>12.2f}%  ❌")
+    
+    logger.info(f"   Nombre de trades:   {results['num_trades']:>12}")
+    logger.info(f"   Drawdown max:       {results['max_drawdown']:>12.2f}%")
+    logger.info(f"   Sharpe ratio:       {results['sharpe_ratio']:>12.2f}")
+    logger.info(f"   Win rate:           {results['win_rate']:>12.2f}%")
+    logger.info("")
+    logger.info("=" * 70)
+    logger.info("")
+
+
 def main():
     """Main function"""
     logger.remove()
@@ -146,10 +429,11 @@ def main():
     logger.info("=" * 70)
     logger.info("")
     
-    symbols = settings.trading.assets_list
+    # Snapshot des réglages : valeurs simples passées telles quelles aux workers
+    symbols = tuple(settings.trading.assets_list)
     timeframe = '1h'
-    initial_capital = settings.trading.initial_capital
-    commission = settings.trading.simulated_fees
+    initial_capital = float(settings.trading.initial_capital)
+    commission = float(settings.trading.simulated_fees)
     
     logger.info(f"📊 Paramètres:")
     logger.info(f"   Symboles: {', '.join(symbols)}")
@@ -166,47 +450,25 @@ def main():
     
     all_results = {}
     
+    # Chaque symbole est indépendant et CPU-bound : un process par symbole
+    max_workers = max(1, min(len(symbols), os.cpu_count() or 1))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(_run_one, symbol, timeframe, initial_capital, commission): symbol
+            for symbol in symbols
+        }
+        for future in as_completed(futures):
+            symbol = futures[future]
+            results = future.result()
+            if results is None:
+                logger.warning(f"⚠️  Pas de données pour {symbol}, ignoré")
+                continue
+            all_results[symbol] = results
+    
+    # Afficher les résultats dans l'ordre des symboles
     for symbol in symbols:
-        logger.info(f"🔍 Backtesting {symbol}...")
-        logger.info("-" * 70)
-        
-        # Charger les données
-        df = load_historical_data(symbol, timeframe)
-        if df is None or df.empty:
-            logger.warning(f"⚠️  Pas de données pour {symbol}, ignoré")
-            continue
-        
-        # Calculer les indicateurs
-        logger.info(f"📊 Calcul des indicateurs techniques...")
-        df = calculate_indicators(df)
-        
-        # Générer les signaux
-        logger.info(f"🎯 Génération des signaux de trading...")
-        signals = generate_signals(df)
-        
-        # Backtest
-        logger.info(f"⚙️  Exécution du backtest...")
-        results = backtest_strategy(df, signals, initial_capital, commission)
-        all_results[symbol] = results
-        
-        # Afficher les résultats
-        logger.info("")
-        logger.info(f"📈 Résultats pour {symbol}:")
-        logger.info(f"   Capital initial:    {results['initial_capital']:>12,.2f}€")
-        logger.info(f"   Capital final:      {results['final_equity']:>12,.2f}€")
-        
-        if results['total_return'] >= 0:
-            logger.success(f"   Rendement total:    {results['total_return']:>12.2f}%  ✅")
-        else:
-            logger.error(f"   Rendement total:    {results['total_return']:>12.2f}%  ❌")
-        
-        logger.info(f"   Nombre de trades:   {results['num_trades']:>12}")
-        logger.info(f"   Drawdown max:       {results['max_drawdown']:>12.2f}%")
-        logger.info(f"   Sharpe ratio:       {results['sharpe_ratio']:>12.2f}")
-        logger.info(f"   Win rate:           {results['win_rate']:>12.2f}%")
-        logger.info("")
-        logger.info("=" * 70)
-        logger.info("")
+        if symbol in all_results:
+            log_results(symbol, all_results[symbol])
     
     # Résumé global
     if all_results:
@@ -252,8 +514,6 @@ if __name__ == "__main__":
     try:
         main()
     except Exception as e:
-        logger.error(f"Erreur: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.opt(exception=True).error(f"Erreur: {e}")
         sys.exit(1)
 
@@ -18,6 +18,12 @@ from src.data_ingestion.news_ingestion import NewsIngestion
 from src.ml.sentiment_analyzer import SentimentAnalyzer
 from src.ml.ai_signal_generator import AISignalGenerator
 from src.strategy.autonomous_trader import AutonomousTrader
+from src.storage.redis_client import RedisClient
+from src.utils import fastjson
+
+
+# News fraîches publiées par bot_intelligent (Redis pub/sub) : réveil anticipé du cycle
+NEWS_CHANNEL = "news:new"
 
 
 class AutonomousTradingBot:
@@ -29,7 +35,14 @@ class AutonomousTradingBot:
         self.sentiment_analyzer = None
         self.ai_generator = None
         self.autonomous_trader = None
+        self.redis_client = None
         self.running = False
+        # Réveil anticipé du cycle (news, arrêt, déclenchement manuel)
+        self.wake_event = asyncio.Event()
+        self._bar_task = None
+        self._news_task = None
+        # Cycle en cours, protégé par asyncio.shield (voir run)
+        self._cycle_task = None
         
         logger.info("🤖 Bot Autonome initialisé")
     
@@ -72,16 +85,77 @@ class AutonomousTradingBot:
             )
             logger.success("✅ Trader Autonome prêt")
             
+            # 6. Redis (optionnel) : réveil sur les news publiées par les autres bots
+            logger.info("📡 Connexion Redis (news temps réel)...")
+            try:
+                self.redis_client = RedisClient()
+                self.redis_client.initialize()
+                logger.success("✅ Redis prêt")
+            except Exception as e:
+                self.redis_client = None
+                logger.warning(f"⚠️ Redis indisponible, cycles sur bougie 5m uniquement: {e}")
+            
             logger.info("")
             logger.success("🎉 SYSTÈME AUTONOME 100% INITIALISÉ!")
             logger.info("=" * 80)
             
         except Exception as e:
-            logger.error(f"❌ Échec initialisation: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.opt(exception=True).error(f"❌ Échec initialisation: {e}")
             raise
     
+    def wake(self):
+        """Déclencher un cycle sans attendre la prochaine bougie"""
+        self.wake_event.set()
+    
+    async def _news_listener(self):
+        """Réveiller le cycle quand une news concerne une crypto de l'univers"""
+        pubsub = self.redis_client.subscribe([NEWS_CHANNEL])
+        if pubsub is None:
+            return
+        
+        universe = {symbol.split('/')[0] for symbol in AutonomousTrader.UNIVERSE}
+        try:
+            while self.running:
+                # Client Redis synchrone : attente bornée hors de la boucle asyncio
+                message = await asyncio.to_thread(
+                    pubsub.get_message, ignore_subscribe_messages=True, timeout=1.0
+                )
+                if not message:
+                    continue
+                
+                # Un message invalide est ignoré, l'écoute continue
+                try:
+                    item = fastjson.loads(message['data'])
+                    if not isinstance(item, dict):
+                        raise ValueError(f"objet JSON attendu, reçu {type(item).__name__}")
+                    if universe.intersection(item.get('currencies') or []):
+                        logger.info(f"📰 News: {item.get('title')} - cycle anticipé")
+                        self.wake()
+                except Exception as e:
+                    logger.warning(f"⚠️ Message news ignoré sur {NEWS_CHANNEL}: {e}")
+        
+        except Exception as e:
+            logger.error(f"Erreur écoute news: {e}")
+        finally:
+            pubsub.close()
+    
+    async def _wait_next_cycle(self, timeout: float = 300):
+        """Attendre la clôture de bougie 5m ou un réveil, au plus `timeout` secondes"""
+        waiters = [
+            asyncio.create_task(self.market_data.bar_event.wait()),
+            asyncio.create_task(self.wake_event.wait()),
+        ]
+        try:
+            await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+        
+        # Les événements arrivés pendant un cycle restent levés jusqu'ici :
+        # un cycle lent ne fait donc rater aucune bougie
+        self.market_data.bar_event.clear()
+        self.wake_event.clear()
+    
     async def run(self):
         """Boucle principale autonome"""
         self.running = True
@@ -99,10 +173,19 @@ class AutonomousTradingBot:
         logger.info("   5. Gérer sa watchlist dynamiquement")
         logger.info("   6. Choisir entre FLIP (court terme) ou HOLD (moyen terme)")
         logger.info("")
-        logger.info("💡 Le bot analyse le marché toutes les 5 minutes")
+        logger.info("💡 Le bot analyse le marché à chaque clôture de bougie 5 minutes (ou dès une news)")
         logger.info("💡 Appuyez sur Ctrl+C pour arrêter")
         logger.info("=" * 80)
         
+        # Le mode ne change pas en cours d'exécution : ligne de log calculée une fois
+        trading_mode = settings.trading.trading_mode
+        mode_msg = "⚠️ ARGENT RÉEL !" if trading_mode == "live" else "(Simulation)"
+        mode_line = f"💡 Mode: {trading_mode.upper()} {mode_msg}"
+        
+        self._bar_task = asyncio.create_task(self.market_data.watch_candle_close('5m'))
+        if self.redis_client:
+            self._news_task = asyncio.create_task(self._news_listener())
+        
         try:
             while self.running:
                 iteration += 1
@@ -112,8 +195,10 @@ class AutonomousTradingBot:
                 logger.info(f"🔄 CYCLE AUTONOME #{iteration} - {datetime.now().strftime('%H:%M:%S')}")
                 logger.info("=" * 80)
                 
-                # Exécuter la stratégie autonome
-                recommendations = await self.autonomous_trader.execute_autonomous_strategy()
+                # Exécuter la stratégie autonome : une annulation (Ctrl+C, arrêt)
+                # n'interrompt pas un cycle à moitié fait, il se termine avant shutdown
+                self._cycle_task = asyncio.create_task(self.autonomous_trader.execute_autonomous_strategy())
+                recommendations = await asyncio.shield(self._cycle_task)
                 
                 # Afficher statistiques
                 logger.info("")
@@ -129,21 +214,24 @@ class AutonomousTradingBot:
                 
                 logger.info("")
                 logger.info("=" * 80)
-                logger.info(f"⏰ Prochain scan dans 5 minutes...")
-                mode_msg = "⚠️ ARGENT RÉEL !" if settings.trading.trading_mode == "live" else "(Simulation)"
-                logger.info(f"💡 Mode: {settings.trading.trading_mode.upper()} {mode_msg}")
+                logger.info(f"⏰ Prochain scan à la clôture de la bougie 5m...")
+                logger.info(mode_line)
                 logger.info("=" * 80)
                 
-                # Attendre 5 minutes
-                await asyncio.sleep(300)
+                # Attendre la prochaine bougie (ou un réveil), 5 minutes max
+                await self._wait_next_cycle(timeout=300)
                 
         except KeyboardInterrupt:
             logger.info("\n⏸️ Arrêt demandé par l'utilisateur")
         except Exception as e:
-            logger.error(f"\n❌ Erreur dans la boucle: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.opt(exception=True).error(f"\n❌ Erreur dans la boucle: {e}")
         finally:
+            if self._cycle_task and not self._cycle_task.done():
+                logger.info("⏳ Fin du cycle en cours avant l'arrêt...")
+                try:
+                    await self._cycle_task
+                except Exception as e:
+                    logger.error(f"❌ Erreur dans le cycle en cours: {e}")
             await self.shutdown()
     
     async def shutdown(self):
@@ -155,10 +243,16 @@ class AutonomousTradingBot:
         
         self.running = False
         
+        if self._bar_task:
+            self._bar_task.cancel()
+        if self._news_task:
+            self._news_task.cancel()
         if self.market_data:
             await self.market_data.close()
         if self.news_ingestion:
             await self.news_ingestion.close()
+        if self.redis_client:
+            self.redis_client.close()
         
         logger.success("✅ Bot arrêté proprement")
         logger.info("=" * 80)
@@ -195,9 +289,10 @@ async def main():
     logger.info("   4. Contrarian : Prix bas + news + → ACHAT opportuniste")
     logger.info("   5. Risk Exit : News négatives → VENTE immédiate")
     logger.info("")
-    capital_type = "RÉEL" if settings.trading.trading_mode == "live" else "simulé"
+    trading_mode = settings.trading.trading_mode
+    capital_type = "RÉEL" if trading_mode == "live" else "simulé"
     logger.info(f"💰 Capital {capital_type}: {settings.trading.initial_capital:,.0f}€")
-    logger.info(f"📊 Mode: {settings.trading.trading_mode.upper()}")
+    logger.info(f"📊 Mode: {trading_mode.upper()}")
     logger.info("")
     logger.info("=" * 80)
     
@@ -227,8 +322,6 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         logger.info("\n👋 Bot autonome arrêté")
     except Exception as e:
-        logger.error(f"\n❌ Erreur fatale: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.opt(exception=True).error(f"\n❌ Erreur fatale: {e}")
         sys.exit(1)
 
@@ -4,10 +4,19 @@ BOT INTELLIGENT - Trading avec LLM qui Réfléchit
 Le LLM analyse, raisonne et explique chaque décision
 """
 import sys
+import re
+import signal
 import asyncio
-import json
+import time
+import hashlib
+from collections import defaultdict
+from functools import cached_property, lru_cache
+from itertools import islice
 from pathlib import Path
 from datetime import datetime
+from typing import Optional
+import httpx
+import numpy as np
 from loguru import logger
 
 # Add src to path
@@ -16,9 +25,371 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from src.config import settings
 from src.data_ingestion.market_data import MarketDataIngestion
 from src.data_ingestion.news_ingestion import NewsIngestion
-from src.ml.llm_analyzer import LLMAnalyzer
+from src.ml.llm_analyzer import LLMAnalyzer, OLLAMA_NUM_PREDICT
 from src.execution.order_executor import OrderExecutor
 from src.storage.redis_client import RedisClient
+from src.storage.semantic_cache import SemanticLLMCache
+from src.utils import fastjson
+from src.utils.njit import njit
+
+
+# Nombre max de générations LLM simultanées (Ollama local est limité par le GPU)
+LLM_CONCURRENCY = 4
+# Requêtes exchange simultanées (limites de débit Kraken)
+IO_CONCURRENCY = 6
+
+OLLAMA_URL = "http://localhost:11434"
+
+# Cryptos principales à analyser (paires EUR)
+TOP_CRYPTOS = (
+    'BTC/EUR', 'ETH/EUR', 'SOL/EUR', 'BNB/EUR',
+    'XRP/EUR', 'ADA/EUR', 'AVAX/EUR', 'DOT/EUR',
+    'LINK/EUR', 'UNI/EUR', 'ATOM/EUR', 'ALGO/EUR'
+)
+
+# La liste des marchés Kraken bouge rarement : rafraîchie une fois par jour
+MARKETS_TTL = 86400
+# News CryptoPanic par devise en cache Redis (titres identiques pendant des minutes)
+NEWS_CACHE_TTL = 180
+_NEWS_CACHE_KEY = "news:cp:{}".format
+# Liste filtrée persistée dans Redis : un redémarrage ne recharge pas les marchés
+ACTIVE_MARKETS_KEY = "markets:kraken:active:eur"
+ACTIVE_MARKETS_REDIS_TTL = 3600
+
+# Déclencheurs d'analyse : variation de prix depuis la dernière analyse,
+# ou nouvelle news sur la crypto
+PRICE_TRIGGER = 0.005
+TICKER_POLL_INTERVAL = 15
+# Une analyse réutilise les prix relevés par la surveillance il y a moins de 10 s
+TICKER_MAX_AGE = 10
+NEWS_POLL_INTERVAL = 120
+# News fraîches partagées entre processus (Redis pub/sub)
+NEWS_CHANNEL = "news:new"
+
+# Sans nouvelle news et à moins de 0.3% du prix de la dernière analyse (de
+# moins d'une heure), la réponse serait ATTENDRE : HOLD sans appel LLM
+STALE_PRICE_DELTA = 0.003
+STALE_MAX_AGE = 3600
+
+# Présélection avant le LLM : seules les LLM_TOP_K cryptos les plus actives
+# (momentum + volatilité sur PRESELECT_BARS bougies 5m) sont analysées
+LLM_TOP_K = 3
+PRESELECT_BARS = 24
+# Indicateurs donnés au LLM, calculés sur ces mêmes bougies (rechargées à
+# chaque nouvelle bougie 5m)
+BAR_SECONDS = 300
+TECH_RSI_PERIOD = 14
+TECH_SMA_PERIOD = 20
+
+# Préchargement Ollama renouvelé (modèle résident même si les cycles s'espacent)
+OLLAMA_WARMUP_INTERVAL = 240
+
+# Cache Redis des analyses LLM (TTL 9 min), version à
+# incrémenter à chaque modification des prompts (ou du format des analyses)
+# pour invalider le cache
+LLM_CACHE_TTL = 540
+PROMPT_VERSION = 5
+# Second niveau : news de même sens (similarité d'embeddings), même contexte
+SEMANTIC_CACHE_TTL = 600
+
+# Parsing de la réponse LLM : lignes "CHAMP: valeur", éventuellement
+# préfixées par du markdown ("**DÉCISION:** ...", "- CONFIANCE: 80%")
+_FIELD_RE = re.compile(
+    r'^[^\w\n]*(DÉCISION|DECISION|CONFIANCE|CONFIDENCE|TAILLE|SIZE|RAISON|REASON)[^\w\n:]*:\s*(.*)$',
+    re.I | re.M
+)
+# Champs complets d'un JSON éventuellement tronqué (flux interrompu) :
+# chaîne fermée, ou nombre suivi de son séparateur
+_JSON_FIELD_RE = re.compile(
+    r'"(DÉCISION|DECISION|CONFIANCE|CONFIDENCE|TAILLE|SIZE|RAISON|REASON)"\s*:\s*'
+    r'(?:"((?:[^"\\]|\\.)*)"|(-?\d+(?:\.\d+)?)(?=\s*[,}]))',
+    re.I
+)
+_NUM_RE = re.compile(r'(\d+)')
+_JSON_BLOCK_RE = re.compile(r'\{.*\}', re.S)
+# Repli ASCII des noms de champs (DÉCISION -> DECISION)
+_ASCII_FOLD = str.maketrans('É', 'E')
+# Valeur de DÉCISION, sans recopie en majuscules (ACHETER prioritaire sur VENDRE)
+_BUY_RE = re.compile(r'ACHETER|BUY', re.I)
+_SELL_RE = re.compile(r'VENDRE|SELL', re.I)
+
+
+def _parse_action(value: str) -> str:
+    """'BUY' | 'SELL' | 'HOLD' depuis la valeur du champ DÉCISION"""
+    if _BUY_RE.search(value):
+        return "BUY"
+    if _SELL_RE.search(value):
+        return "SELL"
+    return "HOLD"
+
+
+# Prompts LLM (formatés à chaque analyse, construits une seule fois).
+# Consignes fixes en tête, données variables en fin : Ollama réutilise le
+# KV-cache du préfixe commun avec l'appel précédent et ne calcule que la fin
+_NEWS_LINE = "- {}".format
+_TECH_SUMMARY = "RSI{} {{:.0f}}, écart SMA{} {{:+.1%}}, volatilité {{:.2%}}".format(
+    TECH_RSI_PERIOD, TECH_SMA_PERIOD
+).format
+_NO_TECH = "indisponible"
+
+_PROMPT_PREAMBLE = "Tu es un algorithme de trading. Analyse technique uniquement (pas conseil financier).\n"
+
+_EXIT_PROMPT = (_PROMPT_PREAMBLE + """Position active. Signal de sortie?
+Format:
+DÉCISION: VENDRE/HOLD
+CONFIANCE: [0-100]%
+RAISON: [analyse technique courte]
+
+{symbol} @ {price:.2f}€
+Entrée: {entry:.2f}€ | PnL: {pnl:+.1f}%
+Technique 5m: {tech}
+NEWS: {news}""").format
+
+_ENTRY_PROMPT = (_PROMPT_PREAMBLE + """Signal d'achat détecté?
+Format:
+DÉCISION: ACHETER/ATTENDRE
+CONFIANCE: [0-100]%
+TAILLE: [{min_pct}-85]%
+RAISON: [analyse technique courte]
+Note: Minimum {min_pct}% requis (10€ minimum Kraken)
+
+Capital: {capital}€
+{symbol} @ {price:.2f}€
+Technique 5m: {tech}
+NEWS: {news}""").format
+
+# Scan groupé : un seul prompt (préambule partagé) pour toutes les cryptos
+_BATCH_ROW = "{}|{:.2f}€|{}|{}".format
+
+_BATCH_PROMPT = (_PROMPT_PREAMBLE + """Signal d'achat détecté pour chaque crypto?
+Réponds UNIQUEMENT en JSON, une entrée par crypto:
+{{"BTC/EUR": {{"DÉCISION": "ACHETER/ATTENDRE", "CONFIANCE": [0-100], "TAILLE": [{min_pct}-85], "RAISON": "[analyse technique courte]"}}}}
+Note: Minimum {min_pct}% requis (10€ minimum Kraken)
+
+Capital: {capital}€
+CRYPTOS (SYMBOLE|PRIX|TECHNIQUE 5M|NEWS):
+{rows}""").format
+
+
+# Décodage contraint (Ollama) : mêmes champs que le format texte, mais la
+# grammaire garantit une réponse complète et parsable, sans préambule
+_ENTRY_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "DÉCISION": {"enum": ["ACHETER", "ATTENDRE"]},
+        "CONFIANCE": {"type": "integer", "minimum": 0, "maximum": 100},
+        "TAILLE": {"type": "integer", "minimum": 0, "maximum": 85},
+        "RAISON": {"type": "string", "maxLength": 200},
+    },
+    "required": ["DÉCISION", "CONFIANCE", "TAILLE", "RAISON"],
+}
+
+_EXIT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "DÉCISION": {"enum": ["VENDRE", "HOLD"]},
+        "CONFIANCE": {"type": "integer", "minimum": 0, "maximum": 100},
+        "RAISON": {"type": "string", "maxLength": 200},
+    },
+    "required": ["DÉCISION", "CONFIANCE", "RAISON"],
+}
+
+
+def _iter_fields(response: str):
+    """(CHAMP, valeur) d'une réponse LLM, JSON contraint ou texte libre"""
+    if response.lstrip().startswith('{'):
+        try:
+            data = fastjson.loads(response)
+        except fastjson.JSONDecodeError:
+            data = None
+        if isinstance(data, dict):
+            for key, value in data.items():
+                yield key.upper().translate(_ASCII_FOLD), str(value)
+            return
+        
+        # Flux interrompu avant la fin : seulement les champs complets
+        for match in _JSON_FIELD_RE.finditer(response):
+            value = match.group(3) if match.group(2) is None else match.group(2)
+            if '\\' in value:
+                value = fastjson.loads(f'"{value}"')
+            yield match.group(1).upper().translate(_ASCII_FOLD), value
+        return
+    
+    for match in _FIELD_RE.finditer(response):
+        yield match.group(1).upper().translate(_ASCII_FOLD), match.group(2).strip(' *",')
+
+
+def _news_digest(news_list: list) -> str:
+    """Empreinte des titres des news (ordre indifférent)"""
+    titles = sorted(n.get('title') or '' for n in islice(news_list, 5))
+    return hashlib.blake2b("|".join(titles).encode(), digest_size=16).hexdigest()
+
+
+def _preselection_scores(closes: np.ndarray) -> np.ndarray:
+    """
+    Score d'activité par crypto, une ligne de `closes` par symbole
+    |momentum| + 2 × volatilité des log-rendements
+    """
+    returns = np.diff(np.log(closes), axis=1)
+    volatility = returns.std(axis=1)
+    momentum = closes[:, -1] / closes[:, 0] - 1
+    return np.abs(momentum) + 2 * volatility
+
+
+@njit(cache=True)
+def _technical_features(closes):
+    """
+    RSI, écart du dernier prix à la SMA et volatilité des log-rendements
+    Une seule passe sur les clôtures (au moins TECH_SMA_PERIOD + 1)
+    """
+    n = closes.shape[0]
+    gains = 0.0
+    losses = 0.0
+    sma_sum = 0.0
+    sum_r = 0.0
+    sum_r2 = 0.0
+    for i in range(1, n):
+        delta = closes[i] - closes[i - 1]
+        if i >= n - TECH_RSI_PERIOD:
+            if delta > 0:
+                gains += delta
+            else:
+                losses -= delta
+        if i >= n - TECH_SMA_PERIOD:
+            sma_sum += closes[i]
+        r = np.log(closes[i] / closes[i - 1])
+        sum_r += r
+        sum_r2 += r * r
+    
+    rsi = 100.0 if losses == 0.0 else 100.0 - 100.0 / (1.0 + gains / losses)
+    sma_gap = closes[n - 1] / (sma_sum / TECH_SMA_PERIOD) - 1.0
+    mean = sum_r / (n - 1)
+    volatility = np.sqrt(max(sum_r2 / (n - 1) - mean * mean, 0.0))
+    return rsi, sma_gap, volatility
+
+
+def _analysis_from_fields(fields, response: str) -> Optional[dict]:
+    """
+    Analyse au format du bot depuis des paires (CHAMP, valeur)
+    None si aucun champ DÉCISION n'a été lu (réponse vide ou hors format)
+    """
+    decision = None
+    confidence = 50
+    position_size = 0
+    explanation = response
+    
+    for field, value in fields:
+        if field == 'DECISION':
+            decision = _parse_action(value)
+        
+        elif field in ('CONFIANCE', 'CONFIDENCE'):
+            # Extraire le nombre
+            number = _NUM_RE.search(value)
+            if number:
+                confidence = int(number.group(1))  # pourcentage entier
+        
+        elif field in ('TAILLE', 'SIZE'):
+            number = _NUM_RE.search(value)
+            if number:
+                position_size = int(number.group(1)) / 100
+        
+        elif field in ('RAISON', 'REASON'):
+            explanation = value
+    
+    if decision is None:
+        return None
+    return {
+        'decision': decision,
+        'confidence': confidence,
+        'position_size': position_size,
+        'explanation': explanation,
+        'raw_response': response
+    }
+
+
+def _analysis_error(error) -> dict:
+    """Analyse HOLD de repli quand le LLM échoue"""
+    return {
+        'decision': 'HOLD',
+        'confidence': 0,
+        'position_size': 0,
+        'explanation': f"Erreur d'analyse: {error}",
+        'raw_response': str(error)
+    }
+
+
+@lru_cache(maxsize=8)
+def _batch_schema(symbols: tuple) -> dict:
+    """Schéma JSON du scan groupé : une entrée _ENTRY_SCHEMA par crypto"""
+    return {
+        "type": "object",
+        "properties": {symbol: _ENTRY_SCHEMA for symbol in symbols},
+        "required": list(symbols),
+    }
+
+
+@lru_cache(maxsize=16)
+def _entry_context(capital: float) -> tuple:
+    """Partie du prompt d'achat qui ne dépend que du capital (recalculée s'il change)"""
+    # Avec 14€, minimum Kraken = 10€ = 71% du capital
+    min_pct = max(71, int((10 / capital) * 100))  # Au moins 10€
+    return f"{capital:.2f}", min_pct
+
+
+# Bannières et en-têtes de log (un seul appel logger par bloc)
+_BANNER = "=" * 80
+_DASH = "-" * 80
+_INIT_HEADER = f"{_BANNER}\n🔧 Initialisation Système Intelligent...\n{_BANNER}"
+_READY_BANNER = f"\n🎉 SYSTÈME INTELLIGENT 100% OPÉRATIONNEL!\n{_BANNER}"
+_SHUTDOWN_HEADER = f"\n{_BANNER}\n🛑 Arrêt du Bot Intelligent...\n{_BANNER}"
+# Heure fournie par le format loguru ({time:HH:mm:ss})
+_CYCLE_HEADER = f"\n{_BANNER}\n🔄 CYCLE #{{}}\n{_BANNER}".format
+_START_BANNER = f"""
+🚀 DÉMARRAGE BOT INTELLIGENT
+{_BANNER}
+
+🧠 LE LLM VA:
+   1. Récupérer les news sur chaque crypto
+   2. RÉFLÉCHIR sur chaque opportunité
+   3. EXPLIQUER sa décision
+   4. Trader UNIQUEMENT si confiant
+
+💡 LOGIQUE OPTIMISÉE:
+   • Sans position → Scan 11 cryptos pour ACHETER
+   • Avec position → Analyse UNIQUEMENT cette crypto (SORTIR/HOLD)
+   • Analyse déclenchée si le prix bouge de plus de {PRICE_TRIGGER:.1%} ou si une news arrive
+{_BANNER}
+"""
+_INTRO_BANNER = f"""{_BANNER}
+🧠 TRADOPS - BOT INTELLIGENT avec LLM
+{_BANNER}
+
+💡 SYSTÈME ULTRA-INTELLIGENT:
+
+   ✅ LLM local (Llama 3.1 via Ollama)
+   ✅ Analyse approfondie de chaque crypto
+   ✅ Réflexion contextuelle (pas juste sentiment)
+   ✅ Explications claires de chaque décision
+   ✅ News en temps réel
+   ✅ Trading intelligent (confiance > 70%)
+
+"""
+_SYMBOL_HEADER = f"\n🔍 Analyse LLM: {{}}\n{_DASH}\n🤖 Décision: {{}}\n📊 Confiance: {{:d}}%".format
+
+
+def _decision_complete(text: str) -> bool:
+    """Arrêt anticipé du streaming LLM : les champs complets suffisent à décider"""
+    if not text.lstrip().startswith('{'):
+        text = text[:max(text.rfind('\n'), 0)]  # texte libre : lignes complètes
+    fields = dict(_iter_fields(text))
+    
+    # RAISON est le dernier champ demandé : la suite n'est que du bavardage
+    if 'RAISON' in fields or 'REASON' in fields:
+        return True
+    
+    # ATTENDRE / HOLD : inutile de générer la raison, la confiance suffit
+    is_hold = 'DECISION' in fields and _parse_action(fields['DECISION']) == "HOLD"
+    return is_hold and ('CONFIANCE' in fields or 'CONFIDENCE' in fields)
 
 
 class IntelligentTradingBot:
@@ -30,10 +401,45 @@ class IntelligentTradingBot:
         self.llm_analyzer = None
         self.order_executor = None
         self.redis_client = RedisClient()
+        # Client HTTP unique (connexions keep-alive) pour la sonde Ollama et le LLM
+        self.http = httpx.AsyncClient(
+            timeout=httpx.Timeout(180.0, connect=2.0),  # 3 min pour Ollama
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=40, keepalive_expiry=30)
+        )
         self.running = False
+        # Levé par shutdown() : interrompt les attentes des boucles
+        self._stop = asyncio.Event()
         self.capital = settings.trading.initial_capital
         self.current_position = None  # {symbol, entry_price, size, entry_time}
         self.position_file = Path(__file__).parent.parent / "data" / "current_position.json"
+        # Borne les appels LLM quand les analyses tournent en parallèle
+        self.llm_semaphore = asyncio.Semaphore(LLM_CONCURRENCY)
+        self._io_sem = asyncio.Semaphore(IO_CONCURRENCY)
+        self.available_cryptos = []
+        self._markets_loaded_at = 0.0
+        # Symboles à (ré)analyser, alimentée par les boucles prix et news
+        self.trigger_queue = asyncio.Queue()
+        self._last_prices = {}  # prix de référence (dernier déclenchement) par symbole
+        # Bougies 5m par symbole : (n° de bougie, clôtures, résumé technique)
+        self._bars = {}
+        self._last_news_ids = set()
+        self._tasks = []
+        # Analyses LLM en cours, par clé de cache (coalescence des doublons)
+        self._inflight = {}
+        # Cache sémantique des analyses (Ollama uniquement, créé dans initialize)
+        self.semantic_cache = None
+        # Entrées de la dernière analyse LLM par symbole : (prix, digest news, timestamp)
+        self._last_analysis = {}
+        # Dernière décision LLM par symbole : (clé de cache, analyse, timestamp)
+        self._last_decision = {}
+        # État de trading en mémoire (source de vérité), recopié dans Redis
+        # par _snapshot_loop : les trades n'attendent pas Redis
+        self._state_lock = asyncio.Lock()
+        # Sérialise les trades (vérification de la position + ordre + mise à jour)
+        self._trade_lock = asyncio.Lock()
+        self._state_dirty = asyncio.Event()
+        self._pending_positions = {}
+        self._pending_trades = []
         
         # Créer le dossier data si nécessaire
         self.position_file.parent.mkdir(parents=True, exist_ok=True)
@@ -43,9 +449,7 @@ class IntelligentTradingBot:
     async def initialize(self):
         """Initialiser tous les composants"""
         try:
-            logger.info("=" * 80)
-            logger.info("🔧 Initialisation Système Intelligent...")
-            logger.info("=" * 80)
+            logger.info(_INIT_HEADER)
             
             # 0. Redis (pour sauvegarder les positions)
             logger.info("💾 Redis...")
@@ -56,17 +460,24 @@ class IntelligentTradingBot:
             logger.info("📊 Market Data...")
             self.market_data = MarketDataIngestion()
             await self.market_data.initialize()
+            await self._refresh_available_cryptos(use_redis=True)
             logger.success("✅ Market Data prêt")
             
             # 2. News
             logger.info("📰 News Ingestion...")
-            self.news_ingestion = NewsIngestion()
+            self.news_ingestion = NewsIngestion(client=self.http)
             logger.success("✅ News prêt")
             
             # 3. LLM (le cerveau)
             llm_provider = getattr(settings.data_sources, 'llm_provider', 'ollama')
             logger.info(f"🧠 Chargement du LLM ({llm_provider.upper()})...")
-            self.llm_analyzer = LLMAnalyzer(provider=llm_provider)
+            self.llm_analyzer = LLMAnalyzer(provider=llm_provider, client=self.http)
+            # Modèle chargé dès maintenant : le premier cycle ne paie pas le chargement
+            await self.llm_analyzer.warmup(_PROMPT_PREAMBLE)
+            if llm_provider == "ollama":
+                self.semantic_cache = SemanticLLMCache(
+                    self.redis_client, self.llm_analyzer.embed, ttl=SEMANTIC_CACHE_TTL
+                )
             provider_name = "ChatGPT" if llm_provider == "openai" else "Ollama"
             logger.success(f"✅ LLM prêt ({provider_name})")
             
@@ -76,14 +487,122 @@ class IntelligentTradingBot:
             await self.order_executor.initialize()
             logger.success("✅ Executor prêt")
             
-            logger.info("")
-            logger.success("🎉 SYSTÈME INTELLIGENT 100% OPÉRATIONNEL!")
-            logger.info("=" * 80)
+            logger.success(_READY_BANNER)
             
         except Exception as e:
             logger.error(f"❌ Erreur initialisation: {e}")
             raise
     
+    async def _refresh_available_cryptos(self, use_redis: bool = False):
+        """Filtrer TOP_CRYPTOS sur les marchés actifs de l'exchange (mis en cache)"""
+        # Au démarrage : liste récente laissée par l'exécution précédente
+        if use_redis:
+            cached = self.redis_client.get(ACTIVE_MARKETS_KEY)
+            if isinstance(cached, list):
+                logger.debug(f"Marchés actifs depuis Redis: {len(cached)} cryptos")
+                self.available_cryptos = cached
+                self._markets_loaded_at = time.monotonic()
+                return
+        
+        markets = await self.market_data.exchange.load_markets()
+        self.available_cryptos = [s for s in TOP_CRYPTOS if markets.get(s, {}).get('active')]
+        self._markets_loaded_at = time.monotonic()
+        self.redis_client.set(ACTIVE_MARKETS_KEY, self.available_cryptos, expiry=ACTIVE_MARKETS_REDIS_TTL)
+    
+    def _holding(self, symbol: str) -> bool:
+        """Position ouverte sur `symbol` ?"""
+        return self.current_position is not None and self.current_position['symbol'] == symbol
+    
+    def _analysis_context(self, symbol: str, price: float) -> str:
+        """Contexte d'analyse hors news : (modèle, version prompt, symbole, tranche de prix, position)"""
+        if self._holding(symbol):
+            position = f"pos:{self.current_position['entry_price']}"
+        else:
+            position = f"cap:{self.capital:.2f}"
+        
+        # 3 chiffres significatifs : un mouvement de prix < ~0.1-1% réutilise l'analyse
+        return f"{self.llm_analyzer.model}|v{PROMPT_VERSION}|{symbol}|{price:.3g}|{position}"
+    
+    @staticmethod
+    def _llm_cache_key(context: str, news_digest: str) -> str:
+        """Clé de cache exacte : contexte d'analyse + empreinte des news"""
+        raw = f"{context}|{news_digest}"
+        return "llm:" + hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+    
+    def _precheck(self, symbol: str, price: float, news_list: list):
+        """
+        Raccourcis avant tout appel LLM
+        
+        Returns:
+            (analyse ou None, digest news, contexte, clé de cache)
+        """
+        news_digest = _news_digest(news_list)
+        
+        # Rien de neuf depuis la dernière analyse LLM : HOLD sans appeler le LLM
+        last = self._last_analysis.get(symbol)
+        if (last is not None
+                and last[1] == news_digest
+                and abs(price - last[0]) / last[0] < STALE_PRICE_DELTA
+                and time.monotonic() - last[2] < STALE_MAX_AGE):
+            logger.debug(f"{symbol}: entrées inchangées, HOLD direct")
+            return {
+                'decision': 'HOLD',
+                'confidence': 0,
+                'position_size': 0,
+                'explanation': "Pas de changement significatif depuis la dernière analyse",
+                'raw_response': ''
+            }, news_digest, None, None
+        
+        # Même symbole, prix quasi identique et mêmes news : réutiliser l'analyse
+        context = self._analysis_context(symbol, price)
+        cache_key = self._llm_cache_key(context, news_digest)
+        
+        # En position : une décision de sortie en cache peut être périmée
+        if self._holding(symbol):
+            return None, news_digest, context, cache_key
+        
+        # Même tranche de prix et mêmes news que la dernière décision : sans Redis
+        decision = self._last_decision.get(symbol)
+        if decision is not None and decision[0] == cache_key and time.monotonic() - decision[2] < LLM_CACHE_TTL:
+            logger.debug(f"Cache LLM {symbol}: HIT (mémoire)")
+            return decision[1], news_digest, context, cache_key
+        
+        cached = self.redis_client.get(cache_key)
+        if cached:
+            logger.debug(f"Cache LLM {symbol}: HIT")
+        else:
+            logger.debug(f"Cache LLM {symbol}: MISS")
+        return cached, news_digest, context, cache_key
+    
+    def _record_analysis(self, symbol: str, price: float, news_digest: str, cache_key: str, result: dict):
+        """
+        Mémoriser une analyse LLM réussie (cache Redis + entrées pour le HOLD direct)
+        Seulement une réponse lue (champ DÉCISION présent) : jamais le HOLD de repli
+        """
+        now = time.monotonic()
+        self._last_analysis[symbol] = (price, news_digest, now)
+        if not self._holding(symbol):
+            self.redis_client.set(cache_key, result, expiry=LLM_CACHE_TTL)
+            self._last_decision[symbol] = (cache_key, result, now)
+    
+    @cached_property
+    def _llm_call(self):
+        """Appel du provider configuré, choisi une seule fois (signature commune)"""
+        llm = self.llm_analyzer
+        if llm.provider == "openai":
+            return lambda prompt, schema, stop, num_predict: llm._stream_openai(prompt, stop=stop, format=schema)
+        if llm.provider == "anthropic":
+            return lambda prompt, schema, stop, num_predict: llm._call_anthropic(prompt)
+        return lambda prompt, schema, stop, num_predict: llm._stream_ollama(
+            prompt, stop=stop, format=schema, num_predict=num_predict
+        )
+    
+    async def _call_llm(self, prompt: str, schema: dict, stop=None,
+                        num_predict: int = OLLAMA_NUM_PREDICT) -> str:
+        """Appeler le LLM (OpenAI, Anthropic ou Ollama selon la configuration)"""
+        async with self.llm_semaphore:
+            return await self._llm_call(prompt, schema, stop, num_predict)
+    
     async def analyze_crypto_with_llm(self, symbol: str, price: float, news_list: list) -> dict:
         """
         Demander au LLM d'analyser une crypto en profondeur
@@ -91,118 +610,233 @@ class IntelligentTradingBot:
         Returns:
             {
                 'decision': 'BUY'|'SELL'|'HOLD',
-                'confidence': 0.0-1.0,
+                'confidence': 0-100,
                 'explanation': "...",
                 'position_size': % du capital
             }
         """
-        # Préparer le contexte pour le LLM
-        news_summary = "\n".join([
-            f"- {news.get('title', 'No title')}"
-            for news in news_list[:3]  # Top 3 news (économie tokens)
-        ])
+        cached, news_digest, context, cache_key = self._precheck(symbol, price, news_list)
+        if cached:
+            return cached
+        return await self._analyze_uncached(symbol, price, news_list, news_digest, context, cache_key)
+    
+    async def _analyze_uncached(self, symbol: str, price: float, news_list: list,
+                                news_digest: str, context: str, cache_key: str) -> dict:
+        """Analyse LLM après _precheck (manqué) : requête en cours, cache sémantique, puis LLM"""
+        # Même analyse déjà en cours (pas encore en cache) : attendre son résultat
+        inflight = self._inflight.get(cache_key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
         
-        if not news_summary:
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[cache_key] = future
+        try:
+            # News formulées autrement mais de même sens : cache sémantique
+            embedding = None
+            if self.semantic_cache and news_list and not self._holding(symbol):
+                titles = "\n".join(n.get('title') or '' for n in islice(news_list, 3))
+                cached, embedding = await self.semantic_cache.lookup(symbol, context, titles)
+                if cached:
+                    logger.debug(f"Cache sémantique LLM {symbol}: HIT")
+                    future.set_result(cached)
+                    return cached
+            
+            result = await self._run_llm_analysis(symbol, price, news_list, news_digest, cache_key)
+            if embedding is not None and result['raw_response'] and result['confidence'] > 0:
+                self.semantic_cache.store(symbol, context, embedding, result)
+            future.set_result(result)
+            return result
+        finally:
+            self._inflight.pop(cache_key, None)
+            if not future.done():
+                future.cancel()
+    
+    async def _run_llm_analysis(self, symbol: str, price: float, news_list: list,
+                                news_digest: str, cache_key: str) -> dict:
+        """Construire le prompt, appeler le LLM et parser sa réponse"""
+        # Préparer le contexte pour le LLM (rien à formater sans news)
+        if news_list:
+            news_summary = "\n".join(
+                _NEWS_LINE(news.get('title', 'No title'))
+                for news in islice(news_list, 3)  # Top 3 news (économie tokens)
+            )
+        else:
             news_summary = "Pas de news"
         
         # Prompt optimisé selon si on a une position ou non
-        if self.current_position and self.current_position['symbol'] == symbol:
+        if self._holding(symbol):
             # EN POSITION : Décider si on SORT ou HOLD
             entry = self.current_position['entry_price']
             pnl = ((price - entry) / entry) * 100
             
-            prompt = f"""Tu es un algorithme de trading. Analyse technique uniquement (pas conseil financier).
-
-{symbol} @ {price:.2f}€
-Entrée: {entry:.2f}€ | PnL: {pnl:+.1f}%
-NEWS: {news_summary}
-
-Position active. Signal de sortie?
-Format:
-DÉCISION: VENDRE/HOLD
-CONFIANCE: [0-100]%
-RAISON: [analyse technique courte]"""
+            prompt = _EXIT_PROMPT(symbol=symbol, price=price, entry=entry, pnl=pnl,
+                                  tech=self._technical_summary(symbol), news=news_summary)
+            schema = _EXIT_SCHEMA
         else:
             # PAS DE POSITION : Décider si on ACHÈTE
-            # Avec 14€, minimum Kraken = 10€ = 71% du capital
-            min_pct = max(71, int((10 / self.capital) * 100))  # Au moins 10€
-            
-            prompt = f"""Tu es un algorithme de trading. Analyse technique uniquement (pas conseil financier).
-
-{symbol} @ {price:.2f}€
-Capital: {self.capital:.2f}€
-NEWS: {news_summary}
-
-Signal d'achat détecté?
-Format:
-DÉCISION: ACHETER/ATTENDRE
-CONFIANCE: [0-100]%
-TAILLE: [{min_pct}-85]%
-RAISON: [analyse technique courte]
-
-Note: Minimum {min_pct}% requis (10€ minimum Kraken)"""
+            capital, min_pct = _entry_context(self.capital)
+            prompt = _ENTRY_PROMPT(symbol=symbol, price=price, capital=capital, min_pct=min_pct,
+                                   tech=self._technical_summary(symbol), news=news_summary)
+            schema = _ENTRY_SCHEMA
 
         try:
-            # Appeler le LLM (auto-détecte OpenAI ou Ollama)
-            if self.llm_analyzer.provider == "openai":
-                response = await self.llm_analyzer._call_openai(prompt)
-            elif self.llm_analyzer.provider == "anthropic":
-                response = await self.llm_analyzer._call_anthropic(prompt)
-            else:
-                response = await self.llm_analyzer._call_ollama(prompt)
-            
-            # Parser la réponse
-            decision = "HOLD"
-            confidence = 0.5
-            position_size = 0
-            explanation = response
-            
-            lines = response.upper().split('\n')
-            for line in lines:
-                if 'DÉCISION' in line or 'DECISION' in line:
-                    if 'ACHETER' in line or 'BUY' in line:
-                        decision = "BUY"
-                    elif 'VENDRE' in line or 'SELL' in line:
-                        decision = "SELL"
-                    else:
-                        decision = "HOLD"
-                
-                if 'CONFIANCE' in line or 'CONFIDENCE' in line:
-                    # Extraire le nombre
-                    import re
-                    match = re.search(r'(\d+)', line)
-                    if match:
-                        confidence = int(match.group(1)) / 100
-                
-                if 'TAILLE' in line or 'SIZE' in line:
-                    import re
-                    match = re.search(r'(\d+)', line)
-                    if match:
-                        position_size = int(match.group(1)) / 100
-                
-                if 'RAISON' in line or 'REASON' in line:
-                    explanation = line.split(':', 1)[1].strip() if ':' in line else response
+            response = await self._call_llm(prompt, schema, stop=_decision_complete)
             
-            return {
-                'decision': decision,
-                'confidence': confidence,
-                'position_size': position_size,
-                'explanation': explanation,
-                'raw_response': response
-            }
+            # Parser la réponse (sans DÉCISION : HOLD de repli, jamais mis en cache)
+            result = _analysis_from_fields(_iter_fields(response), response)
+            if result is None:
+                logger.warning(f"⚠️ {symbol}: réponse LLM sans DÉCISION, non mise en cache")
+                return _analysis_error("réponse LLM sans DÉCISION")
+            self._record_analysis(symbol, price, news_digest, cache_key, result)
+            return result
             
         except Exception as e:
             logger.error(f"Erreur LLM: {e}")
-            return {
-                'decision': 'HOLD',
-                'confidence': 0.0,
-                'position_size': 0,
-                'explanation': f"Erreur d'analyse: {e}",
-                'raw_response': str(e)
-            }
+            return _analysis_error(e)
+    
+    async def analyze_crypto_batch_with_llm(self, rows: list) -> dict:
+        """
+        Analyser plusieurs cryptos (scan sans position) en un seul appel LLM
+        
+        Args:
+            rows: [{'symbol', 'price', 'news'}, ...]
+            
+        Returns:
+            {symbol: analyse} au même format que analyze_crypto_with_llm
+        """
+        analyses = {}
+        pending = []
+        
+        # HOLD direct et cache exact d'abord : seules les cryptos restantes vont au LLM
+        for row in rows:
+            cached, news_digest, context, cache_key = self._precheck(row['symbol'], row['price'], row['news'])
+            if cached:
+                analyses[row['symbol']] = cached
+            else:
+                pending.append((row, news_digest, context, cache_key))
+        
+        if not pending:
+            return analyses
+        if len(pending) == 1:
+            # Une seule crypto : prompt individuel, sans refaire le _precheck
+            row, news_digest, context, cache_key = pending[0]
+            analyses[row['symbol']] = await self._analyze_uncached(
+                row['symbol'], row['price'], row['news'], news_digest, context, cache_key
+            )
+            return analyses
+        
+        symbols = [row['symbol'] for row, _, _, _ in pending]
+        capital, min_pct = _entry_context(self.capital)
+        prompt = _BATCH_PROMPT(
+            capital=capital,
+            min_pct=min_pct,
+            rows="\n".join(
+                _BATCH_ROW(
+                    row['symbol'], row['price'], self._technical_summary(row['symbol']),
+                    " / ".join(n.get('title') or '' for n in islice(row['news'], 3)) if row['news'] else "Pas de news"
+                )
+                for row, _, _, _ in pending
+            )
+        )
+        
+        try:
+            # Une décision par crypto : budget de tokens proportionnel
+            response = await self._call_llm(
+                prompt, _batch_schema(tuple(symbols)), num_predict=OLLAMA_NUM_PREDICT * len(symbols)
+            )
+            
+            # Les LLM locaux ajoutent parfois du texte autour du JSON
+            block = _JSON_BLOCK_RE.search(response)
+            data = fastjson.loads(block.group(0)) if block else {}
+            
+            for row, news_digest, _, cache_key in pending:
+                fields = data.get(row['symbol'])
+                if not isinstance(fields, dict):
+                    analyses[row['symbol']] = _analysis_error("crypto absente de la réponse LLM")
+                    continue
+                
+                result = _analysis_from_fields(
+                    ((key.upper().translate(_ASCII_FOLD), str(value)) for key, value in fields.items()),
+                    fastjson.dumps(fields)
+                )
+                if result is None:
+                    analyses[row['symbol']] = _analysis_error("réponse LLM sans DÉCISION")
+                    continue
+                self._record_analysis(row['symbol'], row['price'], news_digest, cache_key, result)
+                analyses[row['symbol']] = result
+        
+        except Exception as e:
+            logger.error(f"Erreur LLM (batch): {e}")
+            for row, _, _, _ in pending:
+                analyses[row['symbol']] = _analysis_error(e)
+        
+        return analyses
+    
+    def _mark_state_dirty(self, symbol: str, position, order):
+        """Noter un changement d'état à recopier dans Redis (appelé sous _state_lock)"""
+        self._pending_positions[symbol] = position
+        self._pending_trades.append(order)
+        self._state_dirty.set()
+    
+    def _take_pending_state(self):
+        """Récupérer et vider les changements en attente (appelé sous _state_lock)"""
+        state = (self.capital, self._pending_positions, self._pending_trades)
+        self._pending_positions = {}
+        self._pending_trades = []
+        self._state_dirty.clear()
+        return state
+    
+    async def _snapshot_loop(self, interval: float = 1.0):
+        """Recopier l'état de trading dans Redis, au plus une fois par `interval`"""
+        while self.running:
+            await self._state_dirty.wait()
+            async with self._state_lock:
+                capital, positions, trades = self._take_pending_state()
+            
+            # Client Redis synchrone : l'écriture se fait hors de la boucle asyncio
+            await asyncio.to_thread(
+                self.redis_client.save_trading_state, capital, positions=positions, trades=trades
+            )
+            await self._pause(interval)
+    
+    async def _pause(self, seconds: float) -> bool:
+        """Attendre `seconds` secondes, moins si le bot s'arrête (True si arrêt)"""
+        try:
+            await asyncio.wait_for(self._stop.wait(), timeout=seconds)
+            return True
+        except asyncio.TimeoutError:
+            return False
+    
+    async def _keepalive_ollama(self):
+        """Garder le modèle Ollama chargé entre deux cycles espacés"""
+        while self.running:
+            if await self._pause(OLLAMA_WARMUP_INTERVAL):
+                return
+            await self.llm_analyzer.warmup(_PROMPT_PREAMBLE)
+    
+    async def execute_trade(self, symbol: str, decision: str, position_size: float, explanation: str,
+                            last_price: float = None):
+        """
+        Exécuter un trade basé sur la décision du LLM
+        
+        `last_price` : prix déjà connu de l'analyse (sinon relu sur l'exchange) ;
+        montant et quantité sont alors calculés sur le même instantané
+        
+        Un trade à la fois : la décision a pu être prise avant un autre trade,
+        la position est donc revérifiée sous _trade_lock avant l'ordre
+        """
+        async with self._trade_lock:
+            if decision == "BUY" and self.current_position is not None:
+                logger.info(f"⏭️ {symbol}: achat ignoré, position déjà ouverte sur {self.current_position['symbol']}")
+                return
+            if decision == "SELL" and not self._holding(symbol):
+                logger.info(f"⏭️ {symbol}: vente ignorée, aucune position sur ce symbole")
+                return
+            await self._execute_trade(symbol, decision, position_size, explanation, last_price)
     
-    async def execute_trade(self, symbol: str, decision: str, position_size: float, explanation: str):
-        """Exécuter un trade basé sur la décision du LLM"""
+    async def _execute_trade(self, symbol: str, decision: str, position_size: float, explanation: str,
+                             last_price: float = None):
+        """Passer l'ordre et mettre à jour capital/position (appelé sous _trade_lock)"""
         try:
             if decision == "BUY" and position_size > 0:
                 # Calculer le montant
@@ -218,80 +852,93 @@ Note: Minimum {min_pct}% requis (10€ minimum Kraken)"""
                         logger.warning(f"⚠️ Capital trop faible: {self.capital:.2f}€ < 10€ minimum Kraken")
                         return
                 
-                logger.info("")
-                logger.info("=" * 80)
-                logger.success(f"🤖 DÉCISION DU LLM: ACHETER {symbol}")
-                logger.info(f"💰 Montant: {amount_eur:.2f}€ ({position_size*100:.0f}% du capital)")
-                logger.info(f"🧠 Raison: {explanation}")
-                logger.info("=" * 80)
+                logger.success(
+                    f"\n{_BANNER}\n"
+                    f"🤖 DÉCISION DU LLM: ACHETER {symbol}\n"
+                    f"💰 Montant: {amount_eur:.2f}€ ({position_size*100:.0f}% du capital)\n"
+                    f"🧠 Raison: {explanation}\n"
+                    f"{_BANNER}"
+                )
                 
                 # Exécuter l'ordre
-                current_price = await self.market_data.fetch_ticker(symbol)
-                quantity = amount_eur / current_price['last']
+                if last_price is not None:
+                    current_price = last_price
+                else:
+                    current_price = (await self.market_data.fetch_ticker(symbol))['last']
+                quantity = amount_eur / current_price
                 
                 decision_dict = {
                     'symbol': symbol,
                     'side': 'buy',
                     'size': quantity,
                     'order_type': 'market',
-                    'price': current_price['last']
+                    'price': current_price
                 }
                 
                 order = await self.order_executor.execute_order(decision_dict)
                 
                 if order:
                     logger.success(f"✅ ORDRE EXÉCUTÉ: {order}")
-                    self.capital -= amount_eur
-                    
-                    # Sauvegarder la position active
-                    self.current_position = {
-                        'symbol': symbol,
-                        'entry_price': current_price['last'],
-                        'size': quantity,
-                        'entry_time': datetime.now().isoformat(),
-                        'amount_eur': amount_eur
-                    }
+                    async with self._state_lock:
+                        self.capital -= amount_eur
+                        
+                        # Sauvegarder la position active
+                        self.current_position = {
+                            'symbol': symbol,
+                            'entry_price': current_price,
+                            'size': quantity,
+                            'entry_time': datetime.now().isoformat(),
+                            'amount_eur': amount_eur
+                        }
+                        
+                        # Copie Redis mise à jour en arrière-plan (_snapshot_loop)
+                        self._mark_state_dirty(symbol, self.current_position, order)
                     
-                    # Sauvegarder la position
+                    # Copie de secours sur disque, écrite hors de la boucle asyncio
                     try:
                         position_data = {
                             'position': self.current_position,
                             'capital': self.capital
                         }
-                        with open(self.position_file, 'w') as f:
-                            json.dump(position_data, f, indent=2)
+                        await asyncio.to_thread(fastjson.write_file, self.position_file, position_data)
                         logger.success("✅ Position sauvegardée")
                     except Exception as e:
                         logger.warning(f"⚠️ Erreur sauvegarde: {e}")
                     
-                    logger.info("")
-                    logger.success(f"📌 Position ouverte: {symbol}")
-                    logger.info(f"   Taille: {quantity:.6f}")
-                    logger.info(f"   Prix entrée: {current_price['last']:.2f}€")
-                    logger.info(f"   Montant: {amount_eur:.2f}€")
+                    logger.success(
+                        f"\n📌 Position ouverte: {symbol}\n"
+                        f"   Taille: {quantity:.6f}\n"
+                        f"   Prix entrée: {current_price:.2f}€\n"
+                        f"   Montant: {amount_eur:.2f}€"
+                    )
                 else:
                     logger.error("❌ Échec de l'ordre")
             
             elif decision == "SELL" and self.current_position:
                 # Fermer la position
-                logger.info("")
-                logger.info("=" * 80)
-                logger.warning(f"🚪 DÉCISION DU LLM: SORTIR de {symbol}")
-                logger.info(f"🧠 Raison: {explanation}")
-                logger.info("=" * 80)
+                logger.warning(
+                    f"\n{_BANNER}\n"
+                    f"🚪 DÉCISION DU LLM: SORTIR de {symbol}\n"
+                    f"🧠 Raison: {explanation}\n"
+                    f"{_BANNER}"
+                )
                 
                 # Récupérer le prix actuel
-                current_price_data = await self.market_data.fetch_ticker(symbol)
-                current_price = current_price_data['last']
+                if last_price is not None:
+                    current_price = last_price
+                else:
+                    current_price = (await self.market_data.fetch_ticker(symbol))['last']
                 
                 # Calculer le PnL
                 entry = self.current_position['entry_price']
                 pnl_pct = ((current_price - entry) / entry) * 100
                 pnl_eur = (current_price - entry) * self.current_position['size']
                 
-                logger.info(f"💰 Prix entrée: {entry:.2f}€")
-                logger.info(f"💰 Prix sortie: {current_price:.2f}€")
-                logger.info(f"📊 PnL: {pnl_eur:+.2f}€ ({pnl_pct:+.1f}%)")
+                logger.info(
+                    f"💰 Prix entrée: {entry:.2f}€\n"
+                    f"💰 Prix sortie: {current_price:.2f}€\n"
+                    f"📊 PnL: {pnl_eur:+.2f}€ ({pnl_pct:+.1f}%)"
+                )
                 
                 # Vendre
                 decision_dict = {
@@ -305,20 +952,19 @@ Note: Minimum {min_pct}% requis (10€ minimum Kraken)"""
                 order = await self.order_executor.execute_order(decision_dict)
                 
                 if order:
-                    # Récupérer le capital
-                    self.capital += self.current_position['amount_eur'] + pnl_eur
+                    async with self._state_lock:
+                        # Récupérer le capital
+                        self.capital += self.current_position['amount_eur'] + pnl_eur
+                        
+                        # Supprimer la position
+                        self.current_position = None
+                        self._mark_state_dirty(symbol, None, order)
                     
-                    logger.success(f"✅ POSITION FERMÉE")
-                    logger.info(f"💰 Nouveau capital: {self.capital:.2f}€")
+                    logger.success(f"✅ POSITION FERMÉE\n💰 Nouveau capital: {self.capital:.2f}€")
                     
-                    # Supprimer la position
-                    self.current_position = None
                     try:
-                        if self.position_file.exists():
-                            self.position_file.unlink()
                         position_data = {'position': None, 'capital': self.capital}
-                        with open(self.position_file, 'w') as f:
-                            json.dump(position_data, f, indent=2)
+                        await asyncio.to_thread(fastjson.write_file, self.position_file, position_data)
                         logger.success("✅ Position fermée et sauvegardée")
                     except Exception as e:
                         logger.warning(f"⚠️ Erreur sauvegarde: {e}")
@@ -336,19 +982,362 @@ Note: Minimum {min_pct}% requis (10€ minimum Kraken)"""
         except Exception as e:
             logger.error(f"Erreur exécution trade: {e}")
     
+    async def _fetch_news(self, currencies: list, refresh: bool = False):
+        """
+        News CryptoPanic par devise, en cache Redis NEWS_CACHE_TTL secondes
+        
+        Args:
+            currencies: Devises ('BTC', 'ETH', ...)
+            refresh: Ignorer le cache (relevé périodique des news)
+        """
+        news_by_currency = defaultdict(list)
+        missing = currencies
+        
+        # Un seul MGET, puis une requête CryptoPanic pour les devises absentes
+        if not refresh:
+            cached = self.redis_client.get_many([_NEWS_CACHE_KEY(c) for c in currencies])
+            missing = []
+            for currency, items in zip(currencies, cached):
+                if items is None:
+                    missing.append(currency)
+                else:
+                    news_by_currency[currency] = items
+        
+        if missing:
+            news = await self.news_ingestion.fetch_cryptopanic(missing)
+            
+            # Répartir les news par devise en un seul passage
+            fetched = {currency: [] for currency in missing}
+            for item in news:
+                for currency in item.get('currencies', []):
+                    if currency in fetched:
+                        fetched[currency].append(item)
+            news_by_currency.update(fetched)
+            
+            # Réponse vide = erreur ou clé absente : ne pas la mettre en cache
+            if news:
+                self.redis_client.set_many(
+                    {_NEWS_CACHE_KEY(c): items for c, items in fetched.items()},
+                    expiry=NEWS_CACHE_TTL
+                )
+        
+        return news_by_currency
+    
+    async def _fetch_inputs(self, symbols: list):
+        """Prix et news de toutes les cryptos en deux requêtes groupées"""
+        return await asyncio.gather(
+            self.market_data.fetch_multiple_tickers(symbols, max_age=TICKER_MAX_AGE),
+            self._fetch_news([s.split('/')[0] for s in symbols])
+        )
+    
+    async def _analyze_one(self, symbol: str, price: float, news: list):
+        """Demander l'analyse d'une crypto au LLM"""
+        analysis = await self.analyze_crypto_with_llm(symbol, price, news)
+        return symbol, analysis
+    
+    async def _fetch_bars(self, symbol: str) -> list:
+        """Bougies 5m, présélection et indicateurs (requêtes exchange bornées par _io_sem)"""
+        async with self._io_sem:
+            return await self.market_data.fetch_ohlcv(symbol, '5m', limit=PRESELECT_BARS)
+    
+    async def _load_bars(self, symbols: list):
+        """Recharger les bougies 5m (et leur résumé technique) des symboles sans la bougie courante"""
+        bar = int(time.time() // BAR_SECONDS)
+        stale = [s for s in symbols if self._bars.get(s, (None,))[0] != bar]
+        if not stale:
+            return
+        
+        ohlcv = await asyncio.gather(*[self._fetch_bars(s) for s in stale], return_exceptions=True)
+        for symbol, candles in zip(stale, ohlcv):
+            if isinstance(candles, Exception):
+                logger.warning(f"⚠️ Bougies {symbol} indisponibles: {candles}")
+                candles = []
+            closes = np.array([c['close'] for c in candles], dtype=np.float64)
+            if len(closes) > TECH_SMA_PERIOD:
+                summary = _TECH_SUMMARY(*_technical_features(closes))
+            else:
+                summary = _NO_TECH
+            # Réessayer à la prochaine analyse si l'exchange n'a rien renvoyé
+            self._bars[symbol] = (bar if len(closes) else None, closes, summary)
+    
+    def _technical_summary(self, symbol: str) -> str:
+        """Résumé des indicateurs de la dernière bougie chargée (pour le prompt)"""
+        entry = self._bars.get(symbol)
+        return entry[2] if entry else _NO_TECH
+    
+    async def _preselect(self, symbols: list) -> list:
+        """Garder les LLM_TOP_K cryptos les plus actives (ordre du scan conservé)"""
+        await self._load_bars(symbols)
+        bars = [self._bars[s][1] for s in symbols]
+        
+        # Longueur commune pour empiler les clôtures (une ligne par symbole)
+        n_bars = min(len(closes) for closes in bars)
+        if n_bars < 2:
+            return symbols
+        closes = np.stack([c[-n_bars:] for c in bars])
+        
+        top = set(np.argsort(_preselection_scores(closes))[-LLM_TOP_K:].tolist())
+        return [s for i, s in enumerate(symbols) if i in top]
+    
+    def _watched_symbols(self) -> list:
+        """Cryptos surveillées : celle en position, sinon tout le scan"""
+        # LOGIQUE OPTIMISÉE : Si en position, analyser UNIQUEMENT cette crypto !
+        if self.current_position:
+            return [self.current_position['symbol']]
+        return self.available_cryptos
+    
+    def _trigger(self, symbol: str, reason: str):
+        """Demander une nouvelle analyse de `symbol`"""
+        logger.debug(f"⚡ {symbol}: {reason}")
+        self.trigger_queue.put_nowait(symbol)
+    
+    async def _ticker_loop(self):
+        """Surveiller les prix et déclencher une analyse sur variation significative"""
+        # ccxt.async_support n'a pas de websocket : polling groupé des tickers
+        while self.running:
+            try:
+                # Marchés Kraken en cache, rechargés toutes les 24h
+                if time.monotonic() - self._markets_loaded_at > MARKETS_TTL:
+                    await self._refresh_available_cryptos()
+                
+                tickers = await self.market_data.fetch_multiple_tickers(self._watched_symbols())
+                for symbol, ticker in tickers.items():
+                    price = ticker.get('last')
+                    if not price:
+                        continue
+                    
+                    last = self._last_prices.get(symbol)
+                    if last is None:
+                        self._last_prices[symbol] = price
+                        self._trigger(symbol, "première observation")
+                    elif abs(price - last) / last > PRICE_TRIGGER:
+                        self._last_prices[symbol] = price
+                        self._trigger(symbol, f"prix {(price - last) / last:+.2%}")
+            
+            except Exception as e:
+                logger.error(f"Erreur surveillance prix: {e}")
+            
+            await self._pause(TICKER_POLL_INTERVAL)
+    
+    async def _news_poll_loop(self):
+        """
+        Relever les news et déclencher une analyse des cryptos concernées
+        Le premier relevé ne fait que mémoriser les news déjà parues : ni
+        publication, ni analyse pour tout le flux au démarrage
+        """
+        primed = False
+        while self.running:
+            try:
+                watched = {s.split('/')[0]: s for s in self._watched_symbols()}
+                # Toujours frais ici, et remet le cache des analyses à jour
+                news_by_currency = await self._fetch_news(list(watched), refresh=True)
+                
+                news_ids = set()
+                fresh = {}
+                for currency, items in news_by_currency.items():
+                    for item in items:
+                        news_ids.add(item['id'])
+                        if primed and item['id'] not in self._last_news_ids:
+                            fresh[item['id']] = item
+                            self._trigger(watched[currency], f"news: {item.get('title')}")
+                self._last_news_ids = news_ids
+                primed = True
+                
+                # Les autres processus abonnés réagissent sans relever CryptoPanic
+                for item in fresh.values():
+                    self.redis_client.publish(NEWS_CHANNEL, item)
+            
+            except Exception as e:
+                logger.error(f"Erreur surveillance news: {e}")
+            
+            await self._pause(NEWS_POLL_INTERVAL)
+    
+    async def _news_listener(self):
+        """Déclencher une analyse sur les news publiées par d'autres processus"""
+        pubsub = self.redis_client.subscribe([NEWS_CHANNEL])
+        if pubsub is None:
+            return
+        
+        try:
+            while self.running:
+                # Client Redis synchrone : attente bornée hors de la boucle asyncio
+                message = await asyncio.to_thread(
+                    pubsub.get_message, ignore_subscribe_messages=True, timeout=1.0
+                )
+                if not message:
+                    continue
+                
+                # Un message invalide (autre éditeur) est ignoré, l'écoute continue
+                try:
+                    item = fastjson.loads(message['data'])
+                    if not isinstance(item, dict):
+                        raise ValueError(f"objet JSON attendu, reçu {type(item).__name__}")
+                    if item.get('id') in self._last_news_ids:
+                        continue  # déjà vue (ou publiée par ce bot)
+                    self._last_news_ids.add(item.get('id'))
+                    
+                    watched = {s.split('/')[0]: s for s in self._watched_symbols()}
+                    for currency in item.get('currencies') or []:
+                        if currency in watched:
+                            self._trigger(watched[currency], f"news: {item.get('title')}")
+                except Exception as e:
+                    logger.warning(f"⚠️ Message news ignoré sur {NEWS_CHANNEL}: {e}")
+        
+        except Exception as e:
+            logger.error(f"Erreur écoute news: {e}")
+        finally:
+            pubsub.close()
+    
+    async def _next_trigger(self):
+        """Prochain symbole déclenché, ou None si le bot s'arrête"""
+        get = asyncio.ensure_future(self.trigger_queue.get())
+        stop = asyncio.ensure_future(self._stop.wait())
+        try:
+            await asyncio.wait((get, stop), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            stop.cancel()
+            if not get.done():
+                get.cancel()
+        if self._stop.is_set() or get.cancelled():
+            return None
+        return get.result()
+    
+    async def _analysis_loop(self):
+        """Analyser les cryptos déclenchées puis exécuter les décisions"""
+        cycle = 0
+        
+        # Le mode ne change pas en cours d'exécution : ligne de log calculée une fois
+        trading_mode = settings.trading.trading_mode
+        mode_line = f"⚠️  Mode: {trading_mode.upper()} {'- ARGENT RÉEL !' if trading_mode == 'live' else '(Simulation)'}"
+        
+        while self.running:
+            # Attendre un déclenchement, puis regrouper ceux déjà en attente
+            first = await self._next_trigger()
+            if first is None:
+                break
+            triggered = [first]
+            while not self.trigger_queue.empty():
+                triggered.append(self.trigger_queue.get_nowait())
+            
+            # Sans doublons, et seulement les cryptos encore surveillées
+            watched = set(self._watched_symbols())
+            cryptos_to_analyze = [s for s in dict.fromkeys(triggered) if s in watched]
+            if not cryptos_to_analyze:
+                continue
+            
+            # Scan : le LLM ne voit que les cryptos les plus actives
+            if not self.current_position and len(cryptos_to_analyze) > LLM_TOP_K:
+                try:
+                    cryptos_to_analyze = await self._preselect(cryptos_to_analyze)
+                except Exception as e:
+                    logger.error(f"Erreur présélection: {e}")
+            
+            cycle += 1
+            logger.info(_CYCLE_HEADER(cycle))
+            
+            if self.current_position:
+                logger.info(
+                    f"📌 Position active: {self.current_position['symbol']}\n"
+                    f"💰 Valeur: {self.current_position['size']:.4f} × prix actuel\n"
+                    f"🎯 Analyse: SORTIR ou HOLD ?\n"
+                )
+            else:
+                logger.info(
+                    f"📊 Pas de position active - Scan pour opportunités...\n"
+                    f"✅ {len(cryptos_to_analyze)} cryptos à analyser\n"
+                )
+            
+            # Phase 1 : prix et news groupés, puis analyses LLM (groupées en scan)
+            (tickers, news_by_currency), _ = await asyncio.gather(
+                self._fetch_inputs(cryptos_to_analyze),
+                self._load_bars(cryptos_to_analyze)
+            )
+            for symbol in cryptos_to_analyze:
+                if symbol not in tickers:
+                    logger.error(f"Erreur analyse {symbol}: prix indisponible")
+            cryptos_to_analyze = [s for s in cryptos_to_analyze if s in tickers]
+            
+            if not self.current_position and len(cryptos_to_analyze) > 1:
+                # Scan : une seule requête LLM pour toutes les cryptos
+                analyses = await self.analyze_crypto_batch_with_llm([
+                    {
+                        'symbol': symbol,
+                        'price': tickers[symbol]['last'],
+                        'news': news_by_currency[symbol.split('/')[0]]
+                    }
+                    for symbol in cryptos_to_analyze
+                ])
+                results = [(symbol, analyses[symbol]) for symbol in cryptos_to_analyze]
+            else:
+                results = await asyncio.gather(
+                    *[
+                        self._analyze_one(symbol, tickers[symbol]['last'], news_by_currency[symbol.split('/')[0]])
+                        for symbol in cryptos_to_analyze
+                    ],
+                    return_exceptions=True
+                )
+            
+            # Phase 2 : affichage et exécution dans l'ordre du scan
+            for symbol, result in zip(cryptos_to_analyze, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Erreur analyse {symbol}: {result}")
+                    continue
+                
+                _, analysis = result
+                try:
+                    logger.info(_SYMBOL_HEADER(symbol, analysis['decision'], analysis['confidence']))
+                    # Réponse brute seulement en DEBUG (extrait calculé uniquement si affiché)
+                    logger.opt(lazy=True).debug(
+                        "💭 Réponse LLM:\n   {}...", lambda: analysis['raw_response'][:200]
+                    )
+                    
+                    # Exécuter si BUY avec confiance élevée (une seule position à la
+                    # fois : les analyses parallèles peuvent proposer plusieurs achats)
+                    if (analysis['decision'] == 'BUY' and analysis['confidence'] > 70
+                            and not self.current_position):
+                        await self.execute_trade(
+                            symbol, 
+                            analysis['decision'],
+                            analysis['position_size'],
+                            analysis['explanation'],
+                            last_price=tickers[symbol]['last']
+                        )
+                
+                except Exception as e:
+                    logger.error(f"Erreur analyse {symbol}: {e}")
+                    continue
+            
+            # Résumé
+            position_line = ""
+            if self.current_position:
+                position_line = f"📌 Position: {self.current_position['symbol']} ({self.current_position['amount_eur']:.2f}€)\n"
+            logger.info(
+                f"\n{_BANNER}\n{position_line}"
+                f"💰 Capital disponible: {self.capital:.2f}€\n"
+                f"⏰ Prochaine analyse au prochain mouvement de prix ou news..."
+            )
+            logger.warning(mode_line)
+            logger.info(_BANNER)
+    
     async def run(self):
         """Boucle principale du bot"""
         self.running = True
-        cycle = 0
+        self._stop.clear()
         
-        # Restaurer la position depuis le fichier JSON
+        # Restaurer la position : état Redis (copie de référence), sinon fichier JSON
         try:
-            if self.position_file.exists():
-                with open(self.position_file, 'r') as f:
-                    position_data = json.load(f)
-                    self.current_position = position_data.get('position')
-                    self.capital = position_data.get('capital', self.capital)
-                
+            # Lectures bloquantes (Redis, disque) hors de la boucle asyncio
+            state = await asyncio.to_thread(self.redis_client.load_trading_state)
+            saved = state is not None or self.position_file.exists()
+            if state is not None:
+                self.capital, positions = state
+                self.current_position = next(iter(positions.values()), None)
+            elif saved:
+                position_data = fastjson.loads(await asyncio.to_thread(self.position_file.read_bytes))
+                self.current_position = position_data.get('position')
+                self.capital = position_data.get('capital', self.capital)
+            
+            if saved:
                 if self.current_position:
                     logger.success(f"📌 Position restaurée: {self.current_position['symbol']}")
                     logger.info(f"   Taille: {self.current_position['size']:.6f}")
@@ -362,110 +1351,19 @@ Note: Minimum {min_pct}% requis (10€ minimum Kraken)"""
         except Exception as e:
             logger.warning(f"⚠️ Erreur restauration position: {e}")
         
-        logger.info("")
-        logger.info("🚀 DÉMARRAGE BOT INTELLIGENT")
-        logger.info("=" * 80)
-        logger.info("")
-        logger.info("🧠 LE LLM VA:")
-        logger.info("   1. Récupérer les news sur chaque crypto")
-        logger.info("   2. RÉFLÉCHIR sur chaque opportunité")
-        logger.info("   3. EXPLIQUER sa décision")
-        logger.info("   4. Trader UNIQUEMENT si confiant")
-        logger.info("")
-        logger.info("💡 LOGIQUE OPTIMISÉE:")
-        logger.info("   • Sans position → Scan 11 cryptos pour ACHETER")
-        logger.info("   • Avec position → Analyse UNIQUEMENT cette crypto (SORTIR/HOLD)")
-        logger.info("   • Cycle toutes les 5 minutes")
-        logger.info("=" * 80)
-        logger.info("")
+        logger.info(_START_BANNER)
+        
+        self._tasks = [
+            asyncio.create_task(self._ticker_loop()),
+            asyncio.create_task(self._news_poll_loop()),
+            asyncio.create_task(self._news_listener()),
+            asyncio.create_task(self._snapshot_loop()),
+        ]
+        if self.llm_analyzer.provider == "ollama":
+            self._tasks.append(asyncio.create_task(self._keepalive_ollama()))
         
         try:
-            while self.running:
-                cycle += 1
-                logger.info("")
-                logger.info("=" * 80)
-                logger.info(f"🔄 CYCLE #{cycle} - {datetime.now().strftime('%H:%M:%S')}")
-                logger.info("=" * 80)
-                
-                # LOGIQUE OPTIMISÉE : Si en position, analyser UNIQUEMENT cette crypto !
-                if self.current_position:
-                    logger.info(f"📌 Position active: {self.current_position['symbol']}")
-                    logger.info(f"💰 Valeur: {self.current_position['size']:.4f} × prix actuel")
-                    logger.info("🎯 Analyse: SORTIR ou HOLD ?")
-                    logger.info("")
-                    
-                    # Analyser uniquement la crypto en position
-                    cryptos_to_analyze = [self.current_position['symbol']]
-                else:
-                    # Pas de position : scanner toutes les cryptos pour ACHETER
-                    logger.info("📊 Pas de position active - Scan pour opportunités...")
-                    
-                    # Cryptos principales à analyser (paires EUR)
-                    top_cryptos = [
-                        'BTC/EUR', 'ETH/EUR', 'SOL/EUR', 'BNB/EUR',
-                        'XRP/EUR', 'ADA/EUR', 'AVAX/EUR', 'DOT/EUR',
-                        'LINK/EUR', 'UNI/EUR', 'ATOM/EUR', 'ALGO/EUR'
-                    ]
-                    
-                    # Vérifier qu'elles existent sur Kraken
-                    markets = await self.market_data.exchange.load_markets()
-                    cryptos_to_analyze = [s for s in top_cryptos if s in markets and markets[s]['active']]
-                    
-                    logger.info(f"✅ {len(cryptos_to_analyze)} cryptos à analyser")
-                
-                logger.info("")
-                
-                for symbol in cryptos_to_analyze:
-                    try:
-                        logger.info("")
-                        logger.info(f"🔍 Analyse LLM: {symbol}")
-                        logger.info("-" * 80)
-                        
-                        # Prix actuel
-                        ticker = await self.market_data.fetch_ticker(symbol)
-                        price = ticker['last']
-                        
-                        # News
-                        base_currency = symbol.split('/')[0]
-                        news = await self.news_ingestion.fetch_cryptopanic([base_currency])
-                        
-                        # Demander au LLM d'analyser
-                        analysis = await self.analyze_crypto_with_llm(symbol, price, news)
-                        
-                        logger.info(f"🤖 Décision: {analysis['decision']}")
-                        logger.info(f"📊 Confiance: {analysis['confidence']*100:.0f}%")
-                        logger.info(f"💭 Réponse LLM:")
-                        logger.info(f"   {analysis['raw_response'][:200]}...")
-                        
-                        # Exécuter si BUY avec confiance élevée
-                        if analysis['decision'] == 'BUY' and analysis['confidence'] > 0.7:
-                            await self.execute_trade(
-                                symbol, 
-                                analysis['decision'],
-                                analysis['position_size'],
-                                analysis['explanation']
-                            )
-                        
-                        # Pause entre chaque crypto
-                        await asyncio.sleep(5)
-                    
-                    except Exception as e:
-                        logger.error(f"Erreur analyse {symbol}: {e}")
-                        continue
-                
-                # Résumé
-                logger.info("")
-                logger.info("=" * 80)
-                if self.current_position:
-                    logger.info(f"📌 Position: {self.current_position['symbol']} ({self.current_position['amount_eur']:.2f}€)")
-                logger.info(f"💰 Capital disponible: {self.capital:.2f}€")
-                logger.info(f"⏰ Prochain scan dans 5 minutes...")
-                is_live = settings.trading.trading_mode == "live"
-                logger.warning(f"⚠️  Mode: {settings.trading.trading_mode.upper()} {'- ARGENT RÉEL !' if is_live else '(Simulation)'}")
-                logger.info("=" * 80)
-                
-                # Attendre 5 minutes
-                await asyncio.sleep(300)
+            await self._analysis_loop()
         
         except KeyboardInterrupt:
             logger.info("\n🛑 Arrêt demandé...")
@@ -474,17 +1372,29 @@ Note: Minimum {min_pct}% requis (10€ minimum Kraken)"""
         finally:
             await self.shutdown()
     
+    def stop(self):
+        """Demander l'arrêt : les boucles sortent de leurs attentes immédiatement"""
+        self.running = False
+        self._stop.set()
+    
     async def shutdown(self):
         """Arrêt propre"""
-        logger.info("")
-        logger.info("=" * 80)
-        logger.info("🛑 Arrêt du Bot Intelligent...")
-        logger.info("=" * 80)
+        logger.info(_SHUTDOWN_HEADER)
+        
+        self.stop()
+        for task in self._tasks:
+            task.cancel()
+        
+        # Dernière copie de l'état si des trades n'ont pas encore été recopiés
+        if self._state_dirty.is_set():
+            capital, positions, trades = self._take_pending_state()
+            self.redis_client.save_trading_state(capital, positions=positions, trades=trades)
         
         if self.market_data:
             await self.market_data.close()
         if self.order_executor:
             await self.order_executor.close()
+        await self.http.aclose()
         
         logger.success("✅ Bot arrêté proprement")
 
@@ -495,49 +1405,41 @@ async def main():
     logger.add(
         sys.stdout,
         format="<green>{time:HH:mm:ss}</green> | <level>{level: <8}</level> | <level>{message}</level>",
-        level="INFO"
+        level="INFO",
+        enqueue=True  # écriture stdout dans un thread dédié, hors de la boucle de trading
     )
     
-    logger.info("=" * 80)
-    logger.info("🧠 TRADOPS - BOT INTELLIGENT avec LLM")
-    logger.info("=" * 80)
-    logger.info("")
-    logger.info("💡 SYSTÈME ULTRA-INTELLIGENT:")
-    logger.info("")
-    logger.info("   ✅ LLM local (Llama 3.1 via Ollama)")
-    logger.info("   ✅ Analyse approfondie de chaque crypto")
-    logger.info("   ✅ Réflexion contextuelle (pas juste sentiment)")
-    logger.info("   ✅ Explications claires de chaque décision")
-    logger.info("   ✅ News en temps réel")
-    logger.info("   ✅ Trading intelligent (confiance > 70%)")
-    logger.info("")
     capital_type = "RÉEL" if settings.trading.trading_mode == "live" else "simulé"
-    logger.info(f"💰 Capital {capital_type}: {settings.trading.initial_capital:.0f}€")
-    logger.info(f"📊 Mode: {settings.trading.trading_mode.upper()}")
-    logger.info("")
-    logger.info("=" * 80)
+    logger.info(
+        f"{_INTRO_BANNER}"
+        f"💰 Capital {capital_type}: {settings.trading.initial_capital:.0f}€\n"
+        f"📊 Mode: {settings.trading.trading_mode.upper()}\n"
+        f"\n{_BANNER}"
+    )
+    
+    bot = IntelligentTradingBot()
     
-    # Vérifier Ollama
-    import httpx
+    # Vérifier Ollama (avec le client HTTP du bot, réutilisé ensuite par le LLM)
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get("http://localhost:11434/api/tags", timeout=5.0)
-            if response.status_code == 200:
-                logger.success("")
-                logger.success("✅ Ollama détecté et actif!")
-                logger.success("")
-            else:
-                raise Exception("Ollama non accessible")
+        response = await bot.http.get(f"{OLLAMA_URL}/api/tags", timeout=5.0)
+        if response.status_code == 200:
+            logger.success("\n✅ Ollama détecté et actif!\n")
+            
+            # Le modèle quantifié configuré doit avoir été téléchargé
+            model = settings.data_sources.ollama_model
+            installed = {m.get('name') for m in response.json().get('models', [])}
+            if model not in installed:
+                logger.warning(f"⚠️ Modèle {model} absent, téléchargez-le avec: ollama pull {model}")
+        else:
+            raise Exception("Ollama non accessible")
     except Exception as e:
-        logger.error("")
-        logger.error("❌ Ollama n'est pas lancé!")
-        logger.error("   Lancez-le avec: ollama serve &")
-        logger.error("")
+        logger.error("\n❌ Ollama n'est pas lancé!\n   Lancez-le avec: ollama serve &\n")
+        await bot.http.aclose()
         return
     
-    # Lancer le bot
-    bot = IntelligentTradingBot()
+    # Lancer le bot (SIGTERM, ex. docker stop : arrêt propre sans attendre)
     await bot.initialize()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, bot.stop)
     await bot.run()
 
 
@@ -547,8 +1449,6 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         logger.info("\n👋 Bot arrêté")
     except Exception as e:
-        logger.error(f"\n❌ Erreur fatale: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.opt(exception=True).error(f"\n❌ Erreur fatale: {e}")
         sys.exit(1)
 
@@ -3,11 +3,13 @@
 BOT SOLANA FAST FLIP - Trading ultra-rapide sur tokens Solana
 """
 import sys
+import re
 import asyncio
-import json
+import time
+import httpx
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 from loguru import logger
 
 # Add src to path
@@ -16,7 +18,133 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from src.config import settings
 from src.execution.jupiter_executor import JupiterExecutor
 from src.data_ingestion.dex_screener import DexScreener
-from src.ml.llm_analyzer import LLMAnalyzer
+from src.ml.llm_analyzer import LLMAnalyzer, OLLAMA_NUM_PREDICT
+from src.utils import fastjson
+
+
+# Scan : le top 5 est analysé en un seul appel LLM (un bloc numéroté par token)
+SCAN_TOP_N = 5
+# Appels LLM simultanés au plus (repli token par token, limite RPM OpenAI)
+LLM_CONCURRENCY = 5
+# En position : prix relu toutes les 3 s pour le stop loss / take profit,
+# ChatGPT consulté toutes les 30 s
+PRICE_POLL_INTERVAL = 3
+LLM_CHECK_INTERVAL = 30
+# Durée maximale en position (s)
+MAX_HOLD_SECONDS = 3600
+# ChatGPT n'est reconsulté que si le PnL a bougé d'au moins LLM_PNL_STEP points
+# depuis sa dernière réponse, ou s'il sort de la zone calme (proche du SL / TP)
+LLM_PNL_STEP = 1.0
+LLM_QUIET_ZONE = (-2.0, 4.0)
+# Scan : un token déjà analysé n'est renvoyé à ChatGPT que si son prix (%) ou son
+# volume 24h (%) a bougé depuis, ou après SCAN_CACHE_TTL secondes
+SCAN_PRICE_DELTA = 1.0
+SCAN_VOLUME_DELTA = 10.0
+SCAN_CACHE_TTL = 900
+# Attente entre deux scans sans achat : 30 s, doublée à chaque scan vide (max 5 min),
+# interrompue dès qu'une nouvelle paire apparaît
+SCAN_BACKOFF_BASE = 30
+SCAN_BACKOFF_MAX = 300
+
+_BANNER = "=" * 80
+_DASH = "-" * 80
+
+_BATCH_TOKEN = """#{idx} {symbol} @ ${price:.6f}
+Δ1h: {change_1h:+.1f}% | Δ24h: {change_24h:+.1f}%
+Vol: ${volume:.0f}k | Liq: ${liquidity:.0f}k""".format
+
+_BATCH_PROMPT = """{tokens}
+
+Fast flip possible pour chaque token?
+Réponds UNIQUEMENT en JSON, une entrée par numéro de token:
+{{"1": {{"DÉCISION": "ACHETER/ATTENDRE", "CONFIANCE": [0-100], "RAISON": "[1 phrase]"}}}}""".format
+
+# Réponses JSON : mode JSON (OpenAI) ou décodage contraint par le schéma (Ollama)
+_ENTRY_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "DÉCISION": {"enum": ["ACHETER", "ATTENDRE"]},
+        "CONFIANCE": {"type": "integer", "minimum": 0, "maximum": 100},
+        "RAISON": {"type": "string", "maxLength": 200},
+    },
+    "required": ["DÉCISION", "CONFIANCE", "RAISON"],
+}
+
+_EXIT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "DÉCISION": {"enum": ["VENDRE", "HOLD"]},
+        "CONFIANCE": {"type": "integer", "minimum": 0, "maximum": 100},
+        "RAISON": {"type": "string", "maxLength": 200},
+    },
+    "required": ["DÉCISION", "CONFIANCE", "RAISON"],
+}
+
+
+def _batch_schema(n: int) -> Dict:
+    """Schéma JSON de la réponse groupée : une entrée par numéro de token (1..n)"""
+    keys = [str(i) for i in range(1, n + 1)]
+    return {
+        "type": "object",
+        "properties": {key: _ENTRY_SCHEMA for key in keys},
+        "required": keys,
+    }
+
+
+# Parsing des réponses LLM (regex compilées une fois) : lignes "CHAMP: valeur",
+# éventuellement préfixées par du markdown ("**DÉCISION:** ...")
+_FIELD_RE = re.compile(
+    r'^[^\w\n]*(DÉCISION|DECISION|CONFIANCE|CONFIDENCE|RAISON|REASON)[^\w\n:]*:\s*(.*)$',
+    re.I | re.M
+)
+_NUM_RE = re.compile(r'(\d+)')
+_BUY_RE = re.compile(r'ACHETER|BUY', re.I)
+_SELL_RE = re.compile(r'VENDRE|SELL', re.I)
+
+
+def _parse_action(value: str) -> str:
+    """'BUY' | 'SELL' | 'HOLD' depuis la valeur du champ DÉCISION"""
+    if _BUY_RE.search(value):
+        return "BUY"
+    if _SELL_RE.search(value):
+        return "SELL"
+    return "HOLD"
+
+
+def _analysis_from_fields(fields, explanation: str) -> Dict:
+    """
+    Analyse depuis des paires (CHAMP, valeur)
+    `explanation` sert de raison si la réponse n'a pas de champ RAISON
+    Sans champ DÉCISION, l'analyse est marquée 'failed' (HOLD par défaut)
+    """
+    decision = None
+    confidence = 0.5
+    
+    for field, value in fields:
+        field = field.upper()
+        if field in ('DÉCISION', 'DECISION'):
+            decision = _parse_action(value)
+        elif field in ('CONFIANCE', 'CONFIDENCE'):
+            match = _NUM_RE.search(value)
+            if match:
+                confidence = int(match.group(1)) / 100
+        elif field in ('RAISON', 'REASON'):
+            explanation = value
+    
+    if decision is None:
+        return {'decision': 'HOLD', 'confidence': 0.0, 'explanation': explanation[:200], 'failed': True}
+    return {
+        'decision': decision,
+        'confidence': confidence,
+        'explanation': explanation[:200]
+    }
+
+
+def _analysis_from_json(entry) -> Dict:
+    """Analyse d'un token depuis sa réponse JSON (ou son entrée de la réponse groupée)"""
+    if not isinstance(entry, dict):
+        return {'decision': 'HOLD', 'confidence': 0.0, 'explanation': "Token absent de la réponse", 'failed': True}
+    return _analysis_from_fields(((key, str(value)) for key, value in entry.items()), "")
 
 
 class SolanaFlipBot:
@@ -27,11 +155,26 @@ class SolanaFlipBot:
         self.dex_screener = None
         self.llm = None
         self.running = False
+        self.llm_semaphore = asyncio.Semaphore(LLM_CONCURRENCY)
+        # Client HTTP unique (connexions keep-alive) pour Jupiter, DexScreener et le LLM ;
+        # chaque composant fixe son propre timeout par requête
+        self.http = httpx.AsyncClient(
+            timeout=180.0,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=60)
+        )
         
         # Capital et position
         self.capital_sol = settings.trading.initial_capital / 150  # Approx 15€ = 0.1 SOL
         self.current_position = None
+        # Dernier PnL (%) observé en position, None tant qu'aucun prix n'est reçu
+        self._last_pnl = None
+        self._last_llm_pnl = None
         self.position_file = Path(__file__).parent.parent / "data" / "solana_position.json"
+        # Derniers tokens analysés au scan : {adresse: (volume 24h, prix, timestamp)}
+        self._last_scan: Dict[str, tuple] = {}
+        self.scan_cache_file = self.position_file.parent / "scan_cache.json"
+        self._empty_streak = 0
+        self._new_pairs_task = None
         
         # Créer dossier data
         self.position_file.parent.mkdir(parents=True, exist_ok=True)
@@ -41,34 +184,42 @@ class SolanaFlipBot:
     async def initialize(self):
         """Initialiser les composants"""
         try:
-            logger.info("=" * 80)
+            logger.info(_BANNER)
             logger.info("🔧 Initialisation Solana Fast Trading...")
-            logger.info("=" * 80)
+            logger.info(_BANNER)
             
             # 1. Jupiter (swaps)
             logger.info("💱 Jupiter DEX...")
-            self.jupiter = JupiterExecutor()
+            self.jupiter = JupiterExecutor(client=self.http)
             logger.success("✅ Jupiter prêt")
             
             # 2. DexScreener (scanner)
             logger.info("🔍 DexScreener...")
-            self.dex_screener = DexScreener()
+            self.dex_screener = DexScreener(client=self.http)
             logger.success("✅ DexScreener prêt")
             
             # 3. LLM (ChatGPT)
             llm_provider = getattr(settings.data_sources, 'llm_provider', 'openai')
             logger.info(f"🧠 ChatGPT ({llm_provider})...")
-            self.llm = LLMAnalyzer(provider=llm_provider)
+            self.llm = LLMAnalyzer(provider=llm_provider, client=self.http)
             logger.success("✅ ChatGPT prêt")
             
             logger.info("")
             logger.success("🎉 SYSTÈME SOLANA 100% PRÊT!")
-            logger.info("=" * 80)
+            logger.info(_BANNER)
             
         except Exception as e:
             logger.error(f"❌ Erreur initialisation: {e}")
             raise
     
+    async def _call_llm(self, prompt: str, schema: Dict,
+                        num_predict: int = OLLAMA_NUM_PREDICT) -> Optional[str]:
+        """Appeler le LLM avec une réponse JSON imposée par `schema` (OpenAI ou Ollama)"""
+        async with self.llm_semaphore:
+            if self.llm.provider == "openai":
+                return await self.llm._call_openai(prompt, format=schema)
+            return await self.llm._stream_ollama(prompt, format=schema, num_predict=num_predict)
+    
     async def analyze_token_with_chatgpt(
         self, 
         token: Dict, 
@@ -80,7 +231,8 @@ class SolanaFlipBot:
         Analyser un token avec ChatGPT
         
         Returns:
-            {'decision': 'BUY'|'SELL'|'HOLD', 'confidence': float, 'explanation': str}
+            {'decision': 'BUY'|'SELL'|'HOLD', 'confidence': float, 'explanation': str},
+            plus 'failed': True si le LLM n'a pas donné de réponse exploitable
         """
         try:
             symbol = token['symbol']
@@ -100,9 +252,9 @@ Entrée: ${entry_price:.6f} | PnL: {pnl_pct:+.1f}%
 Vol: ${volume/1000:.0f}k
 
 EN POSITION. Sortir maintenant?
-DÉCISION: VENDRE/HOLD
-CONFIANCE: [0-100]%
-RAISON: [1 phrase]"""
+Réponds UNIQUEMENT en JSON:
+{{"DÉCISION": "VENDRE/HOLD", "CONFIANCE": [0-100], "RAISON": "[1 phrase]"}}"""
+                schema = _EXIT_SCHEMA
             else:
                 # PAS DE POSITION : Décider achat
                 prompt = f"""{symbol} @ ${price:.6f}
@@ -110,105 +262,202 @@ RAISON: [1 phrase]"""
 Vol: ${volume/1000:.0f}k | Liq: ${liquidity/1000:.0f}k
 
 Fast flip possible?
-DÉCISION: ACHETER/ATTENDRE
-CONFIANCE: [0-100]%
-RAISON: [1 phrase]"""
+Réponds UNIQUEMENT en JSON:
+{{"DÉCISION": "ACHETER/ATTENDRE", "CONFIANCE": [0-100], "RAISON": "[1 phrase]"}}"""
+                schema = _ENTRY_SCHEMA
             
             # Appeler ChatGPT
-            if self.llm.provider == "openai":
-                response = await self.llm._call_openai(prompt)
-            else:
-                response = await self.llm._call_ollama(prompt)
+            response = await self._call_llm(prompt, schema)
             
-            # Parser réponse
-            decision = "HOLD"
-            confidence = 0.5
-            explanation = response
+            # Parser réponse : JSON attendu, lignes "CHAMP: valeur" en repli
+            try:
+                return _analysis_from_json(fastjson.loads(response))
+            except fastjson.JSONDecodeError:
+                return _analysis_from_fields(
+                    (match.groups() for match in _FIELD_RE.finditer(response)), response
+                )
             
-            if response:
-                lines = response.upper().split('\n')
-                for line in lines:
-                    if 'DÉCISION' in line or 'DECISION' in line:
-                        if 'ACHETER' in line or 'BUY' in line:
-                            decision = "BUY"
-                        elif 'VENDRE' in line or 'SELL' in line:
-                            decision = "SELL"
-                    
-                    if 'CONFIANCE' in line or 'CONFIDENCE' in line:
-                        import re
-                        match = re.search(r'(\d+)', line)
-                        if match:
-                            confidence = int(match.group(1)) / 100
+        except Exception as e:
+            logger.error(f"Erreur ChatGPT: {e}")
+            return {'decision': 'HOLD', 'confidence': 0.0, 'explanation': str(e), 'failed': True}
+    
+    async def analyze_tokens_batch(self, tokens: List[Dict]) -> List[Dict]:
+        """
+        Analyser plusieurs tokens (scan sans position) en un seul appel LLM
+        
+        Returns:
+            Une analyse par token, dans l'ordre de `tokens` (même format que
+            analyze_token_with_chatgpt)
+        """
+        prompt = _BATCH_PROMPT(tokens="\n\n".join(
+            _BATCH_TOKEN(
+                idx=i,
+                symbol=token['symbol'],
+                price=token['price_usd'],
+                change_1h=token.get('price_change_1h', 0),
+                change_24h=token.get('price_change_24h', 0),
+                volume=token.get('volume_24h', 0) / 1000,
+                liquidity=token.get('liquidity_usd', 0) / 1000
+            )
+            for i, token in enumerate(tokens, 1)
+        ))
+        schema = _batch_schema(len(tokens))
+        
+        try:
+            response = await self._call_llm(prompt, schema, num_predict=OLLAMA_NUM_PREDICT * len(tokens))
             
-            return {
-                'decision': decision,
-                'confidence': confidence,
-                'explanation': response[:200]
-            }
+            if not response:
+                raise ValueError("réponse LLM vide")
+            data = fastjson.loads(response)
+            return [_analysis_from_json(data.get(str(i))) for i in range(1, len(tokens) + 1)]
             
         except Exception as e:
-            logger.error(f"Erreur ChatGPT: {e}")
-            return {'decision': 'HOLD', 'confidence': 0.0, 'explanation': str(e)}
+            # Repli : une analyse par token, lancées en parallèle
+            logger.warning(f"⚠️ Analyse groupée impossible ({e}), analyse token par token")
+            return await asyncio.gather(*[self.analyze_token_with_chatgpt(token) for token in tokens])
+    
+    def _scan_delta(self, opportunities: List[Dict]) -> List[Dict]:
+        """Tokens nouveaux ou ayant bougé depuis leur dernière analyse (ordre conservé)"""
+        now = time.time()
+        fresh = []
+        for token in opportunities:
+            seen = self._last_scan.get(token.get('address'))
+            if seen is not None and now - seen[2] < SCAN_CACHE_TTL:
+                volume, price, _ = seen
+                if (abs(token['price_usd'] - price) < price * SCAN_PRICE_DELTA / 100
+                        and abs(token['volume_24h'] - volume) < volume * SCAN_VOLUME_DELTA / 100):
+                    continue
+            fresh.append(token)
+        return fresh
+    
+    async def _analyze_scan(self, top: List[Dict]) -> List[Dict]:
+        """
+        Analyser le top du scan, puis ne mémoriser que les tokens réellement analysés :
+        un échec LLM (clé absente, 429, Ollama arrêté) ne les masque pas au scan suivant
+        """
+        analyses = await self.analyze_tokens_batch(top)
+        analysed = [token for token, analysis in zip(top, analyses) if not analysis.get('failed')]
+        if analysed:
+            await self._remember_scan(analysed)
+            self._empty_streak = 0
+        else:
+            logger.warning("⚠️ Aucune réponse LLM exploitable, tokens conservés pour le prochain scan")
+        return analyses
+    
+    async def _remember_scan(self, tokens: List[Dict]):
+        """Mémoriser les tokens analysés (et sauvegarder pour un redémarrage à chaud)"""
+        now = time.time()
+        self._last_scan = {
+            address: seen for address, seen in self._last_scan.items()
+            if now - seen[2] < SCAN_CACHE_TTL
+        }
+        for token in tokens:
+            if token.get('address'):
+                self._last_scan[token['address']] = (token['volume_24h'], token['price_usd'], now)
+        try:
+            await asyncio.to_thread(fastjson.write_file, self.scan_cache_file, self._last_scan)
+        except Exception as e:
+            logger.warning(f"⚠️ Cache scan non sauvegardé: {e}")
+    
+    async def _wait_next_scan(self):
+        """Attente avant le prochain scan : backoff exponentiel, écourté par une nouvelle paire"""
+        delay = min(SCAN_BACKOFF_BASE * 2 ** self._empty_streak, SCAN_BACKOFF_MAX)
+        self._empty_streak += 1
+        logger.info(f"⏰ Prochain scan dans {delay} s (ou dès qu'une nouvelle paire apparaît)...")
+        
+        event = self.dex_screener.new_pair_event
+        event.clear()
+        try:
+            await asyncio.wait_for(event.wait(), timeout=delay)
+            logger.info("🆕 Nouvelle paire détectée - scan anticipé")
+        except asyncio.TimeoutError:
+            pass
     
     async def monitor_position_realtime(self):
         """
         Surveillance temps réel de la position active
-        Check toutes les 30 secondes avec ChatGPT
+        Stop loss / take profit à chaque prix reçu (toutes les PRICE_POLL_INTERVAL s),
+        consultation ChatGPT toutes les LLM_CHECK_INTERVAL s au plus (seulement si le
+        PnL a bougé ou approche d'un seuil), sortie forcée après
+        MAX_HOLD_SECONDS (asyncio.wait_for, même si les prix n'arrivent plus)
         """
         logger.info("")
         logger.info("🚨 MODE SURVEILLANCE TEMPS RÉEL ACTIVÉ")
-        logger.info("=" * 80)
+        logger.info(_BANNER)
         logger.info(f"📌 Position: {self.current_position['symbol']}")
         logger.info(f"💰 Entrée: ${self.current_position['entry_price']:.6f}")
-        logger.info(f"⏱️  Check toutes les 30 secondes")
-        logger.info("=" * 80)
+        logger.info(f"⏱️  Prix toutes les {PRICE_POLL_INTERVAL} s, ChatGPT toutes les {LLM_CHECK_INTERVAL} s")
+        logger.info(_BANNER)
         logger.info("")
         
+        self._last_pnl = None
+        self._last_llm_pnl = None
+        deadline = asyncio.get_running_loop().time() + MAX_HOLD_SECONDS
+        try:
+            exit_signal = await asyncio.wait_for(self._monitor_loop(deadline), timeout=MAX_HOLD_SECONDS)
+        except asyncio.TimeoutError:
+            logger.warning("⏰ 1h en position - SORTIE AUTOMATIQUE")
+            if self._last_pnl is None:
+                logger.warning("⚠️ Aucun prix reçu : PnL inconnu, calculé sur le swap de sortie")
+            exit_signal = ("Timeout 1h", self._last_pnl)
+        
+        # La vente se fait hors de wait_for : le timeout ne peut pas interrompre un swap
+        if exit_signal and self.current_position:
+            await self.close_position(*exit_signal)
+    
+    async def _monitor_loop(self, deadline: float) -> Optional[Tuple[str, Optional[float]]]:
+        """
+        Boucle de surveillance
+        
+        Returns:
+            (raison, PnL %) si la position doit être fermée, None si le bot s'arrête
+        """
+        loop = asyncio.get_running_loop()
         check_count = 0
-        start_time = datetime.now()
+        last_llm_check = None
         
-        while self.running and self.current_position:
-            check_count += 1
+        async for token_info in self.dex_screener.stream_token_info(
+            self.current_position['address'], interval=PRICE_POLL_INTERVAL
+        ):
+            if not (self.running and self.current_position):
+                return None
+            if not token_info:
+                logger.warning("⚠️ Token info indisponible, attente...")
+                continue
             
             try:
-                # Obtenir prix actuel
-                token_info = await self.dex_screener.get_token_info(
-                    self.current_position['address']
-                )
-                
-                if not token_info:
-                    logger.warning("⚠️ Token info indisponible, attente...")
-                    await asyncio.sleep(30)
-                    continue
-                
                 current_price = token_info['price_usd']
                 entry_price = self.current_position['entry_price']
                 pnl_pct = ((current_price - entry_price) / entry_price) * 100
-                
-                # Check temps en position
-                time_in_position = (datetime.now() - start_time).total_seconds()
-                
-                logger.info(f"🔄 Check #{check_count} - {datetime.now().strftime('%H:%M:%S')}")
-                logger.info(f"💰 Prix: ${current_price:.6f} (entrée: ${entry_price:.6f})")
-                logger.info(f"📊 PnL: {pnl_pct:+.2f}% | Temps: {time_in_position/60:.1f} min")
+                self._last_pnl = pnl_pct
                 
                 # Stop loss forcé
                 if pnl_pct <= -3:
-                    logger.error("🚨 STOP LOSS ATTEINT (-3%) - SORTIE FORCÉE")
-                    await self.close_position("Stop loss", pnl_pct)
-                    break
+                    logger.error(f"🚨 STOP LOSS ATTEINT (-3%) - SORTIE FORCÉE (PnL: {pnl_pct:+.2f}%)")
+                    return "Stop loss", pnl_pct
                 
                 # Take profit auto
                 if pnl_pct >= 5:
-                    logger.success("🎯 TAKE PROFIT ATTEINT (+5%) - SORTIE")
-                    await self.close_position("Take profit", pnl_pct)
-                    break
+                    logger.success(f"🎯 TAKE PROFIT ATTEINT (+5%) - SORTIE (PnL: {pnl_pct:+.2f}%)")
+                    return "Take profit", pnl_pct
                 
-                # Max hold time (1h)
-                if time_in_position > 3600:
-                    logger.warning("⏰ 1h en position - SORTIE AUTOMATIQUE")
-                    await self.close_position("Timeout 1h", pnl_pct)
-                    break
+                # Entre deux consultations ChatGPT : seulement les règles ci-dessus
+                now = loop.time()
+                if last_llm_check is not None and now - last_llm_check < LLM_CHECK_INTERVAL:
+                    continue
+                # PnL stable et loin des seuils : la réponse précédente vaut toujours
+                if (self._last_llm_pnl is not None
+                        and abs(pnl_pct - self._last_llm_pnl) < LLM_PNL_STEP
+                        and LLM_QUIET_ZONE[0] < pnl_pct < LLM_QUIET_ZONE[1]):
+                    continue
+                last_llm_check = now
+                self._last_llm_pnl = pnl_pct
+                check_count += 1
+                time_in_position = MAX_HOLD_SECONDS - (deadline - now)
+                
+                logger.info(f"🔄 Check #{check_count} - {datetime.now().strftime('%H:%M:%S')}")
+                logger.info(f"💰 Prix: ${current_price:.6f} (entrée: ${entry_price:.6f})")
+                logger.info(f"📊 PnL: {pnl_pct:+.2f}% | Temps: {time_in_position/60:.1f} min")
                 
                 # Demander à ChatGPT
                 logger.info("🧠 Consultation ChatGPT...")
@@ -225,29 +474,25 @@ RAISON: [1 phrase]"""
                 # Décision
                 if analysis['decision'] == "SELL" and analysis['confidence'] > 0.7:
                     logger.success("✅ ChatGPT recommande SORTIE avec haute confiance")
-                    await self.close_position("Signal ChatGPT", pnl_pct)
-                    break
+                    return "Signal ChatGPT", pnl_pct
                 elif analysis['decision'] == "HOLD":
                     logger.info("🔒 ChatGPT recommande HOLD - On garde")
                 
-                logger.info(f"⏰ Prochain check dans 30 secondes...")
-                logger.info("-" * 80)
+                logger.info(f"⏰ Prochaine consultation dans {LLM_CHECK_INTERVAL} secondes...")
+                logger.info(_DASH)
                 logger.info("")
                 
-                # Attendre 30 secondes
-                await asyncio.sleep(30)
-                
             except Exception as e:
                 logger.error(f"Erreur surveillance: {e}")
-                await asyncio.sleep(30)
+        return None
     
-    async def close_position(self, reason: str, pnl_pct: float):
-        """Fermer la position actuelle"""
+    async def close_position(self, reason: str, pnl_pct: Optional[float]):
+        """Fermer la position actuelle (`pnl_pct` None : PnL inconnu, déduit du swap)"""
         try:
             logger.info("")
-            logger.info("=" * 80)
+            logger.info(_BANNER)
             logger.warning(f"🚪 FERMETURE POSITION: {reason}")
-            logger.info("=" * 80)
+            logger.info(_BANNER)
             
             # Simuler swap (en attente implémentation wallet)
             result = await self.jupiter.swap_token(
@@ -259,8 +504,10 @@ RAISON: [1 phrase]"""
             if result:
                 # Calculer gains
                 initial_sol = self.current_position['sol_amount']
-                final_sol = result.get('out_amount', initial_sol * (1 + pnl_pct/100))
+                final_sol = result.get('out_amount', initial_sol * (1 + (pnl_pct or 0.0)/100))
                 profit_sol = final_sol - initial_sol
+                if pnl_pct is None:
+                    pnl_pct = (final_sol / initial_sol - 1) * 100
                 
                 self.capital_sol = final_sol
                 
@@ -272,8 +519,7 @@ RAISON: [1 phrase]"""
                 
                 # Supprimer position
                 self.current_position = None
-                if self.position_file.exists():
-                    self.position_file.unlink()
+                await asyncio.to_thread(self.position_file.unlink, missing_ok=True)
                 
                 logger.success("🔓 Retour en mode SCAN")
             else:
@@ -287,31 +533,48 @@ RAISON: [1 phrase]"""
         self.running = True
         cycle = 0
         
-        # Restaurer position si existe
+        # Restaurer position si existe (lecture hors de la boucle asyncio)
         if self.position_file.exists():
-            with open(self.position_file, 'r') as f:
-                data = json.load(f)
+            try:
+                data = fastjson.loads(await asyncio.to_thread(self.position_file.read_bytes))
+                if not isinstance(data, dict) or not isinstance(data.get('position'), (dict, type(None))):
+                    raise ValueError("objet {'position', 'capital_sol'} attendu")
+                capital_sol = float(data.get('capital_sol', self.capital_sol))
+            except (OSError, ValueError, TypeError) as e:  # JSONDecodeError est une ValueError
+                logger.error(f"❌ {self.position_file.name} illisible, ignoré: {e}")
+            else:
                 self.current_position = data.get('position')
-                self.capital_sol = data.get('capital_sol', self.capital_sol)
-            
-            if self.current_position:
-                logger.success(f"📌 Position restaurée: {self.current_position['symbol']}")
+                self.capital_sol = capital_sol
+                if self.current_position:
+                    logger.success(f"📌 Position restaurée: {self.current_position.get('symbol')}")
+        
+        # Restaurer le cache du scan (tokens déjà analysés)
+        if self.scan_cache_file.exists():
+            try:
+                last_scan = fastjson.loads(await asyncio.to_thread(self.scan_cache_file.read_bytes))
+                if isinstance(last_scan, dict):
+                    self._last_scan = last_scan
+            except Exception as e:
+                logger.warning(f"⚠️ Cache scan illisible: {e}")
         
         logger.info("")
         logger.info("🚀 DÉMARRAGE BOT SOLANA FLIP")
-        logger.info("=" * 80)
+        logger.info(_BANNER)
         logger.info("")
         logger.info("⚡ FAST TRADING MODE:")
-        logger.info("   • Sans position → Scan tokens trending (3 min)")
-        logger.info("   • Avec position → Surveillance TEMPS RÉEL (30 sec)")
+        logger.info(f"   • Sans position → Scan tokens trending ({SCAN_BACKOFF_BASE} s à {SCAN_BACKOFF_MAX // 60} min)")
+        logger.info(f"   • Avec position → Surveillance TEMPS RÉEL ({PRICE_POLL_INTERVAL} s)")
         logger.info("   • ChatGPT décide achat/vente")
         logger.info("   • Stop loss: -3% | Take profit: +5%")
         logger.info("   • Max hold: 1h par position")
         logger.info("")
         logger.info(f"💰 Capital: {self.capital_sol:.4f} SOL (~{self.capital_sol * 150:.2f}€)")
-        logger.info("=" * 80)
+        logger.info(_BANNER)
         logger.info("")
         
+        # Démarré après la restauration : arrêté par shutdown() dans le finally ci-dessous
+        self._new_pairs_task = asyncio.create_task(self.dex_screener.watch_new_pairs())
+        
         try:
             while self.running:
                 cycle += 1
@@ -322,9 +585,9 @@ RAISON: [1 phrase]"""
                     # Après sortie, retour au scan
                 else:
                     # MODE SCAN (recherche opportunité)
-                    logger.info("=" * 80)
+                    logger.info(_BANNER)
                     logger.info(f"🔄 SCAN #{cycle} - {datetime.now().strftime('%H:%M:%S')}")
-                    logger.info("=" * 80)
+                    logger.info(_BANNER)
                     logger.info("🔍 Recherche tokens volatils Solana...")
                     
                     # Scanner tokens (filtres assouplis pour plus d'opportunités)
@@ -336,27 +599,34 @@ RAISON: [1 phrase]"""
                     
                     if not opportunities:
                         logger.warning("⚠️ Aucune opportunité détectée")
-                        logger.info("⏰ Prochain scan dans 3 minutes...")
-                        await asyncio.sleep(180)
+                        await self._wait_next_scan()
                         continue
                     
                     logger.info(f"✅ {len(opportunities)} opportunités trouvées")
                     logger.info("")
                     
-                    # Analyser top 5 avec ChatGPT
-                    for i, token in enumerate(opportunities[:5], 1):
+                    # Ne renvoyer à ChatGPT que les tokens nouveaux ou qui ont bougé
+                    fresh = self._scan_delta(opportunities)
+                    if not fresh:
+                        logger.info("⚪ Aucun changement depuis le dernier scan")
+                        await self._wait_next_scan()
+                        continue
+                    
+                    # Analyser top 5 avec ChatGPT (une seule requête)
+                    top = fresh[:SCAN_TOP_N]
+                    for i, token in enumerate(top, 1):
                         logger.info(f"🎯 #{i} - {token['symbol']}")
                         logger.info(f"   Prix: ${token['price_usd']:.6f}")
                         logger.info(f"   Δ24h: {token['price_change_24h']:+.1f}%")
                         logger.info(f"   Volume: ${token['volume_24h']/1000:.0f}k")
                         logger.info(f"   Score flip: {token['flip_score']:.0f}/100")
                         logger.info("")
-                        
-                        # ChatGPT analyse
-                        logger.info(f"🧠 ChatGPT analyse {token['symbol']}...")
-                        analysis = await self.analyze_token_with_chatgpt(token)
-                        
-                        logger.info(f"🤖 Décision: {analysis['decision']} ({analysis['confidence']*100:.0f}%)")
+                    
+                    logger.info(f"🧠 ChatGPT analyse {len(top)} tokens...")
+                    analyses = await self._analyze_scan(top)
+                    
+                    for token, analysis in zip(top, analyses):
+                        logger.info(f"🤖 {token['symbol']}: {analysis['decision']} ({analysis['confidence']*100:.0f}%)")
                         logger.info(f"💭 {analysis['explanation'][:120]}...")
                         logger.info("")
                         
@@ -364,14 +634,10 @@ RAISON: [1 phrase]"""
                         if analysis['decision'] == "BUY" and analysis['confidence'] >= 0.75:
                             await self.open_position(token, analysis)
                             break  # Sortir de la boucle scan
-                        
-                        # Pause entre analyses
-                        await asyncio.sleep(2)
                     
                     if not self.current_position:
                         logger.info("⚪ Aucun signal d'achat fort")
-                        logger.info("⏰ Prochain scan dans 3 minutes...")
-                        await asyncio.sleep(180)
+                        await self._wait_next_scan()
         
         except KeyboardInterrupt:
             logger.info("\n🛑 Arrêt demandé...")
@@ -386,11 +652,11 @@ RAISON: [1 phrase]"""
         """Ouvrir une position sur un token"""
         try:
             logger.info("")
-            logger.info("=" * 80)
+            logger.info(_BANNER)
             logger.success(f"🚀 ACHAT: {token['symbol']}")
             logger.info(f"💰 Montant: {self.capital_sol * 0.85:.4f} SOL (85%)")
             logger.info(f"🧠 ChatGPT: {analysis['explanation'][:150]}")
-            logger.info("=" * 80)
+            logger.info(_BANNER)
             
             # Simuler swap SOL → Token
             sol_amount = self.capital_sol * 0.85
@@ -414,12 +680,11 @@ RAISON: [1 phrase]"""
                 
                 self.capital_sol -= sol_amount
                 
-                # Sauvegarder fichier
-                with open(self.position_file, 'w') as f:
-                    json.dump({
-                        'position': self.current_position,
-                        'capital_sol': self.capital_sol
-                    }, f, indent=2)
+                # Sauvegarder fichier (hors de la boucle asyncio)
+                await asyncio.to_thread(fastjson.write_file, self.position_file, {
+                    'position': self.current_position,
+                    'capital_sol': self.capital_sol
+                })
                 
                 logger.success(f"📌 Position ouverte: {token['symbol']}")
                 logger.info(f"   Prix entrée: ${self.current_position['entry_price']:.6f}")
@@ -433,14 +698,19 @@ RAISON: [1 phrase]"""
     async def shutdown(self):
         """Arrêt propre"""
         logger.info("")
-        logger.info("=" * 80)
+        logger.info(_BANNER)
         logger.info("🛑 Arrêt Bot Solana...")
-        logger.info("=" * 80)
+        logger.info(_BANNER)
         
+        if self._new_pairs_task:
+            self._new_pairs_task.cancel()
         if self.jupiter:
             await self.jupiter.close()
         if self.dex_screener:
             await self.dex_screener.close()
+        if self.llm:
+            await self.llm.close()
+        await self.http.aclose()
         
         logger.success("✅ Bot arrêté")
 
@@ -451,17 +721,18 @@ async def main():
     logger.add(
         sys.stdout,
         format="<green>{time:HH:mm:ss}</green> | <level>{level: <8}</level> | <level>{message}</level>",
-        level="INFO"
+        level="INFO",
+        enqueue=True  # écriture stdout dans un thread dédié, hors de la boucle de trading
     )
     
-    logger.info("=" * 80)
+    logger.info(_BANNER)
     logger.info("🪙 SOLANA FAST FLIP BOT")
-    logger.info("=" * 80)
+    logger.info(_BANNER)
     logger.info("")
     logger.info("⚡ BOT ULTRA-RAPIDE:")
     logger.info("")
     logger.info("   ✅ Tokens Solana volatils (DEX)")
-    logger.info("   ✅ Surveillance temps réel (30 sec) en position")
+    logger.info(f"   ✅ Surveillance temps réel ({PRICE_POLL_INTERVAL} s) en position")
     logger.info("   ✅ ChatGPT décisions rapides")
     logger.info("   ✅ Flips 2-5% en quelques minutes")
     logger.info("   ✅ Stop loss -3% | Take profit +5%")
@@ -470,7 +741,7 @@ async def main():
     logger.info(f"💰 Capital: {capital_eur:.0f}€ (~{capital_eur/150:.4f} SOL)")
     logger.info(f"📊 Mode: {'SIMULATION' if True else 'LIVE'}")  # Simulation pour l'instant
     logger.info("")
-    logger.info("=" * 80)
+    logger.info(_BANNER)
     
     # Vérifier ChatGPT
     llm_provider = getattr(settings.data_sources, 'llm_provider', 'ollama')
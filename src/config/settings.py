@@ -1,5 +1,6 @@
 """Configuration management using Pydantic"""
-from typing import List, Optional
+from functools import cached_property
+from typing import Optional, Tuple
 from pydantic import Field
 from pydantic_settings import BaseSettings
 
@@ -87,7 +88,9 @@ class DataSourceConfig(BaseSettings):
     anthropic_api_key: str = Field(default="", alias="ANTHROPIC_API_KEY")  # Claude
     llm_provider: str = Field(default="ollama", alias="LLM_PROVIDER")  # openai, anthropic, ollama
     llm_model: str = Field(default="gpt-4o-mini", alias="LLM_MODEL")  # gpt-4o-mini, gpt-3.5-turbo, etc.
-    # Ollama: local, no key needed
+    # Ollama: local, no key needed. Tag quantifié explicite (int4 q4_K_M, ~2x plus rapide que FP16)
+    ollama_model: str = Field(default="llama3.1:8b-instruct-q4_K_M", alias="OLLAMA_MODEL")
+    ollama_embed_model: str = Field(default="all-minilm", alias="OLLAMA_EMBED_MODEL")  # Cache sémantique
     
     class Config:
         env_file = ".env"
@@ -180,9 +183,11 @@ class TradingConfig(BaseSettings):
     simulated_slippage: float = Field(default=0.001, alias="SIMULATED_SLIPPAGE")  # 0.1%
     simulated_fees: float = Field(default=0.001, alias="SIMULATED_FEES")  # 0.1%
     
-    @property
-    def assets_list(self) -> List[str]:
-        return [asset.strip() for asset in self.whitelisted_assets.split(",")]
+    @cached_property
+    def assets_list(self) -> Tuple[str, ...]:
+        # Settings are loaded once at startup: parse the whitelist once too.
+        # Immutable, since every caller shares the same cached value
+        return tuple(asset.strip() for asset in self.whitelisted_assets.split(","))
     
     @property
     def is_paper_trading(self) -> bool:
@@ -1,17 +1,33 @@
 """
 DexScreener - Scanner de tokens Solana volatils
 """
+import asyncio
+import time
 import httpx
-from typing import List, Dict, Optional
+from typing import AsyncIterator, List, Dict, Optional
 from loguru import logger
 
 
+# Liste des tokens (Birdeye) réutilisée pendant 60 s : scans et classements
+# successifs partagent la même requête
+TOKEN_LIST_TTL = 60
+
+
 class DexScreener:
     """Scanner de tokens sur DEX Solana"""
     
-    def __init__(self):
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        """
+        Args:
+            client: client HTTP partagé (keep-alive) ; créé et fermé ici si absent
+        """
         self.base_url = "https://api.dexscreener.com/latest/dex"
-        self.client = httpx.AsyncClient(timeout=15.0)
+        self._owns_client = client is None
+        self.client = client or httpx.AsyncClient(timeout=15.0)
+        # Dernière liste de tokens reçue : (monotonic time, paires)
+        self._token_list = None
+        # Levé quand une paire absente de la liste précédente apparaît (voir watch_new_pairs)
+        self.new_pair_event = asyncio.Event()
         
         logger.info("🔍 DexScreener initialisé")
     
@@ -37,21 +53,7 @@ class DexScreener:
             Liste de tokens filtrés et triés
         """
         try:
-            # Utiliser Birdeye API pour tokens Solana (meilleur que DexScreener pour Solana)
-            url = "https://public-api.birdeye.so/defi/tokenlist"
-            headers = {
-                "X-Chain": "solana"
-            }
-            
-            response = await self.client.get(url, headers=headers)
-            
-            if response.status_code != 200:
-                # Fallback : Liste hardcodée de tokens Solana populaires
-                logger.warning(f"API indisponible, utilisation liste backup")
-                return await self._get_backup_tokens()
-            
-            data = response.json()
-            pairs = data.get('data', {}).get('tokens', [])
+            pairs = await self._fetch_token_list()
             
             # Si pas de données, utiliser backup
             if not pairs:
@@ -120,6 +122,29 @@ class DexScreener:
             logger.error(f"Erreur get_trending_tokens: {e}")
             return []
     
+    async def _fetch_token_list(self) -> List[Dict]:
+        """Paires Solana brutes (Birdeye), en cache TOKEN_LIST_TTL secondes ; [] si indisponible"""
+        if self._token_list is not None and time.monotonic() - self._token_list[0] < TOKEN_LIST_TTL:
+            return self._token_list[1]
+        
+        # Utiliser Birdeye API pour tokens Solana (meilleur que DexScreener pour Solana)
+        url = "https://public-api.birdeye.so/defi/tokenlist"
+        headers = {
+            "X-Chain": "solana"
+        }
+        
+        response = await self.client.get(url, headers=headers, timeout=15.0)
+        
+        if response.status_code != 200:
+            # Fallback : Liste hardcodée de tokens Solana populaires
+            logger.warning(f"API indisponible, utilisation liste backup")
+            return []
+        
+        pairs = response.json().get('data', {}).get('tokens', [])
+        if pairs:
+            self._token_list = (time.monotonic(), pairs)
+        return pairs
+    
     async def get_token_info(self, token_address: str) -> Optional[Dict]:
         """
         Obtenir info détaillée d'un token
@@ -133,7 +158,7 @@ class DexScreener:
         try:
             url = f"{self.base_url}/tokens/{token_address}"
             
-            response = await self.client.get(url)
+            response = await self.client.get(url, timeout=15.0)
             
             if response.status_code == 200:
                 data = response.json()
@@ -161,6 +186,42 @@ class DexScreener:
             logger.error(f"Erreur get_token_info: {e}")
             return None
     
+    async def stream_token_info(self, token_address: str, interval: float = 3.0) -> AsyncIterator[Optional[Dict]]:
+        """
+        Flux des infos d'un token, une mise à jour toutes les `interval` secondes
+        
+        DexScreener n'expose pas de websocket public : le flux est un polling
+        court, les consommateurs réagissent à chaque prix reçu. Une requête
+        sans réponse produit None (tick manquant), pour que le consommateur le voie
+        
+        Args:
+            token_address: Adresse du token Solana
+            interval: Délai entre deux requêtes (s)
+        """
+        while True:
+            yield await self.get_token_info(token_address)
+            await asyncio.sleep(interval)
+    
+    async def watch_new_pairs(self, interval: float = TOKEN_LIST_TTL):
+        """
+        Lever `new_pair_event` dès qu'une nouvelle paire entre dans la liste
+        
+        Relit la liste (partagée avec les scans via le cache) toutes les `interval`
+        secondes ; les consommateurs attendent l'événement au lieu d'un délai fixe
+        """
+        known = None
+        while True:
+            try:
+                pairs = await self._fetch_token_list()
+                addresses = {pair.get('baseToken', pair).get('address') for pair in pairs}
+                if known is not None and addresses - known:
+                    self.new_pair_event.set()
+                if addresses:
+                    known = addresses
+            except Exception as e:
+                logger.error(f"Erreur surveillance nouvelles paires: {e}")
+            await asyncio.sleep(interval)
+    
     async def get_top_gainers(self, limit: int = 10) -> List[Dict]:
         """
         Tokens avec plus forte hausse 24h
@@ -375,6 +436,7 @@ class DexScreener:
         return backup_tokens
     
     async def close(self):
-        """Fermer le client HTTP"""
-        await self.client.aclose()
+        """Fermer le client HTTP (sauf s'il est partagé)"""
+        if self._owns_client:
+            await self.client.aclose()
 
@@ -1,5 +1,6 @@
 """Market data ingestion from exchanges using CCXT"""
 import asyncio
+import time
 from typing import Dict, List, Optional
 from datetime import datetime
 import ccxt.async_support as ccxt
@@ -9,6 +10,17 @@ from src.config import settings
 from src.data_ingestion.public_data_provider import PublicDataProvider
 
 
+TIMEFRAME_SECONDS = {
+    '1m': 60,
+    '5m': 300,
+    '15m': 900,
+    '30m': 1800,
+    '1h': 3600,
+    '4h': 14400,
+    '1d': 86400,
+}
+
+
 class MarketDataIngestion:
     """Handles real-time market data ingestion from exchanges"""
     
@@ -18,6 +30,10 @@ class MarketDataIngestion:
         self.ws_connections = {}
         self.public_provider = None
         self.use_public_data = False
+        # Set each time a candle closes (see watch_candle_close)
+        self.bar_event = asyncio.Event()
+        # Last batch-fetched ticker per symbol: (monotonic time, ticker)
+        self._ticker_cache: Dict[str, tuple] = {}
         
     async def initialize(self):
         """Initialize exchange connection"""
@@ -123,22 +139,27 @@ class MarketDataIngestion:
             
             # Use authenticated exchange
             ticker = await self.exchange.fetch_ticker(symbol)
-            return {
-                'symbol': symbol,
-                'timestamp': ticker.get('timestamp'),
-                'datetime': ticker.get('datetime'),
-                'last': ticker.get('last'),
-                'bid': ticker.get('bid'),
-                'ask': ticker.get('ask'),
-                'volume': ticker.get('baseVolume'),
-                'quote_volume': ticker.get('quoteVolume'),
-                'change': ticker.get('change'),
-                'percentage': ticker.get('percentage'),
-            }
+            return self._format_ticker(symbol, ticker)
         except Exception as e:
             logger.error(f"Error fetching ticker for {symbol}: {e}")
             return None
     
+    @staticmethod
+    def _format_ticker(symbol: str, ticker: Dict) -> Dict:
+        """Normalize a CCXT ticker"""
+        return {
+            'symbol': symbol,
+            'timestamp': ticker.get('timestamp'),
+            'datetime': ticker.get('datetime'),
+            'last': ticker.get('last'),
+            'bid': ticker.get('bid'),
+            'ask': ticker.get('ask'),
+            'volume': ticker.get('baseVolume'),
+            'quote_volume': ticker.get('quoteVolume'),
+            'change': ticker.get('change'),
+            'percentage': ticker.get('percentage'),
+        }
+    
     async def fetch_order_book(self, symbol: str, limit: int = 20) -> Optional[Dict]:
         """Fetch order book"""
         try:
@@ -181,12 +202,60 @@ class MarketDataIngestion:
                 logger.error(f"Error streaming trades for {symbol}: {e}")
                 await asyncio.sleep(5)
     
-    async def fetch_multiple_tickers(self, symbols: List[str]) -> Dict[str, Dict]:
-        """Fetch tickers for multiple symbols concurrently"""
+    async def watch_candle_close(self, timeframe: str = '5m'):
+        """
+        Set `bar_event` at every candle close for the given timeframe
+        Consumers await the event instead of sleeping a fixed interval
+        """
+        period = TIMEFRAME_SECONDS[timeframe]
+        while True:
+            now = time.time()
+            await asyncio.sleep(period - (now % period))
+            self.bar_event.set()
+    
+    async def fetch_multiple_tickers(self, symbols: List[str], max_age: float = 0) -> Dict[str, Dict]:
+        """
+        Fetch tickers for multiple symbols concurrently
+        
+        Args:
+            symbols: Symbols to fetch
+            max_age: Reuse tickers fetched less than `max_age` seconds ago
+        """
+        now = time.monotonic()
+        cached = {}
+        if max_age > 0:
+            for symbol in symbols:
+                entry = self._ticker_cache.get(symbol)
+                if entry is not None and now - entry[0] < max_age:
+                    cached[symbol] = entry[1]
+            symbols = [s for s in symbols if s not in cached]
+            if not symbols:
+                return cached
+        
+        tickers = await self._fetch_tickers(symbols)
+        for symbol, ticker in tickers.items():
+            self._ticker_cache[symbol] = (now, ticker)
+        tickers.update(cached)
+        return tickers
+    
+    async def _fetch_tickers(self, symbols: List[str]) -> Dict[str, Dict]:
+        """Fetch tickers from the exchange in as few requests as possible"""
         # Use public provider if available (it has optimized batch fetching)
         if self.use_public_data and self.public_provider:
             return await self.public_provider.fetch_multiple_tickers(symbols)
         
+        # One REST call when the exchange supports batch tickers
+        if self.exchange.has.get('fetchTickers'):
+            try:
+                tickers = await self.exchange.fetch_tickers(symbols)
+                return {
+                    symbol: self._format_ticker(symbol, tickers[symbol])
+                    for symbol in symbols
+                    if symbol in tickers
+                }
+            except Exception as e:
+                logger.error(f"Error fetching tickers: {e}")
+        
         # Otherwise fetch individually
         tasks = [self.fetch_ticker(symbol) for symbol in symbols]
         results = await asyncio.gather(*tasks)
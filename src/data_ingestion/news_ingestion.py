@@ -11,8 +11,13 @@ from src.config import settings
 class NewsIngestion:
     """Fetch news from various sources"""
     
-    def __init__(self):
-        self.client = httpx.AsyncClient(timeout=30.0)
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        """
+        Args:
+            client: Shared HTTP client (keep-alive); created and closed here if absent
+        """
+        self._owns_client = client is None
+        self.client = client or httpx.AsyncClient(timeout=30.0)
         
     async def fetch_cryptopanic(self, currencies: List[str] = None) -> List[Dict]:
         """Fetch news from CryptoPanic"""
@@ -32,7 +37,8 @@ class NewsIngestion:
             if currencies:
                 params['currencies'] = ','.join(currencies)
             
-            response = await self.client.get(url, params=params)
+            # Per-request timeout: a shared client may be tuned for slow LLM calls
+            response = await self.client.get(url, params=params, timeout=30.0)
             response.raise_for_status()
             data = response.json()
             
@@ -114,8 +120,9 @@ class NewsIngestion:
         return all_news
     
     async def close(self):
-        """Close HTTP client"""
-        await self.client.aclose()
+        """Close HTTP client (unless shared)"""
+        if self._owns_client:
+            await self.client.aclose()
 
 
 class SocialMediaIngestion:
@@ -14,9 +14,14 @@ from src.config import settings
 class JupiterExecutor:
     """Execute token swaps on Jupiter DEX (Solana)"""
     
-    def __init__(self):
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        """
+        Args:
+            client: client HTTP partagé (keep-alive) ; créé et fermé ici si absent
+        """
         self.base_url = "https://quote-api.jup.ag/v6"
-        self.client = httpx.AsyncClient(timeout=30.0)
+        self._owns_client = client is None
+        self.client = client or httpx.AsyncClient(timeout=30.0)
         self.slippage_bps = 100  # 1% slippage = 100 basis points
         
         # Token addresses (Solana mainnet)
@@ -78,7 +83,7 @@ class JupiterExecutor:
                 'slippageBps': self.slippage_bps,
             }
             
-            response = await self.client.get(f"{self.base_url}/quote", params=params)
+            response = await self.client.get(f"{self.base_url}/quote", params=params, timeout=30.0)
             
             if response.status_code == 200:
                 return response.json()
@@ -180,7 +185,7 @@ class JupiterExecutor:
             # Utiliser DexScreener pour tokens trending
             url = "https://api.dexscreener.com/latest/dex/tokens/trending/solana"
             
-            response = await self.client.get(url)
+            response = await self.client.get(url, timeout=30.0)
             
             if response.status_code == 200:
                 data = response.json()
@@ -207,6 +212,7 @@ class JupiterExecutor:
             return []
     
     async def close(self):
-        """Fermer les connexions"""
-        await self.client.aclose()
+        """Fermer les connexions (sauf si le client est partagé)"""
+        if self._owns_client:
+            await self.client.aclose()
 
@@ -5,7 +5,7 @@ et décider s'il faut acheter/vendre une crypto
 """
 import json
 import asyncio
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 from datetime import datetime
 import httpx
 from loguru import logger
@@ -13,6 +13,17 @@ from loguru import logger
 from src.config import settings
 
 
+# Durée de maintien du modèle en mémoire après un appel Ollama (-1 = indéfiniment).
+# Par défaut Ollama décharge après 5 min d'inactivité : chaque appel suivant
+# repayait alors le chargement des poids
+OLLAMA_KEEP_ALIVE = -1
+# Fenêtre de contexte fixe : allocation KV plus petite et plus rapide. Doit être
+# identique pour tous les appels, sinon Ollama recharge le modèle
+OLLAMA_NUM_CTX = 2048
+# Tokens générés au plus par décision (4 lignes courtes, RAISON ≤ 200 caractères)
+OLLAMA_NUM_PREDICT = 160
+
+
 class LLMAnalyzer:
     """
     Analyse tweets avec un LLM pour décisions de trading contextuelles
@@ -23,13 +34,15 @@ class LLMAnalyzer:
     - Ollama (local, gratuit)
     """
     
-    def __init__(self, provider: str = "ollama"):
+    def __init__(self, provider: str = "ollama", client: Optional[httpx.AsyncClient] = None):
         """
         Args:
             provider: 'openai', 'anthropic', ou 'ollama'
+            client: client HTTP partagé (keep-alive) ; créé et fermé ici si absent
         """
         self.provider = provider
-        self.client = httpx.AsyncClient(timeout=180.0)  # 3 min pour Ollama
+        self._owns_client = client is None
+        self.client = client or httpx.AsyncClient(timeout=180.0)  # 3 min pour Ollama
         
         # Configuration selon provider
         if provider == "openai":
@@ -44,7 +57,9 @@ class LLMAnalyzer:
             # Ollama local (gratuit!)
             self.api_key = ""
             self.base_url = "http://localhost:11434/api/generate"
-            self.model = "llama3.1:8b"  # OU "mistral", "mixtral", etc.
+            self.embeddings_url = "http://localhost:11434/api/embeddings"
+            self.embed_model = getattr(settings.data_sources, 'ollama_embed_model', 'all-minilm')
+            self.model = getattr(settings.data_sources, 'ollama_model', 'llama3.1:8b')  # OU "mistral", "mixtral", etc.
         
         logger.info(f"🤖 LLM Analyzer initialisé (provider: {provider})")
     
@@ -159,18 +174,78 @@ Réponds UNIQUEMENT en JSON:
             logger.error(f"❌ Erreur appel LLM: {e}")
             return None
     
-    async def _call_ollama(self, prompt: str) -> Optional[str]:
-        """Appeler Ollama (local, gratuit)"""
+    def _ollama_payload(self, prompt: str, stream: bool, format: Optional[Dict] = None,
+                        num_predict: int = OLLAMA_NUM_PREDICT) -> Dict:
+        """
+        Requête /api/generate
+        
+        `format` (schéma JSON) contraint le décodage : Ollama le compile en
+        grammaire et le modèle ne peut générer que des réponses conformes ;
+        `num_predict` borne la génération (le parser n'attend que quelques lignes)
+        """
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": stream,
+            "keep_alive": OLLAMA_KEEP_ALIVE,
+            "options": {
+                "temperature": 0.3,  # Plus déterministe
+                "top_p": 0.9,
+                "num_ctx": OLLAMA_NUM_CTX,
+                "num_predict": num_predict
+            }
+        }
+        if format is not None:
+            payload["format"] = format
+        return payload
+    
+    async def embed(self, text: str) -> Optional[List[float]]:
+        """Embedding d'un texte via Ollama (None si indisponible)"""
+        if self.provider != "ollama":
+            return None
+        try:
+            payload = {
+                "model": self.embed_model,
+                "prompt": text,
+                "keep_alive": OLLAMA_KEEP_ALIVE
+            }
+            response = await self.client.post(self.embeddings_url, json=payload)
+            if response.status_code == 200:
+                return response.json().get('embedding')
+            logger.error(f"Ollama embeddings error: {response.status_code}")
+            return None
+        except Exception as e:
+            logger.error(f"❌ Erreur embeddings Ollama: {e}")
+            return None
+    
+    async def warmup(self, prompt: str = "ok"):
+        """
+        Charger le modèle Ollama à l'avance (génération d'un seul token)
+        
+        Rappelé périodiquement, remet le modèle en mémoire si Ollama a redémarré.
+        Avec le début commun des prompts comme `prompt`, son KV-cache est aussi
+        prérempli pour l'appel suivant
+        """
+        if self.provider != "ollama":
+            return
         try:
             payload = {
                 "model": self.model,
                 "prompt": prompt,
                 "stream": False,
-                "options": {
-                    "temperature": 0.3,  # Plus déterministe
-                    "top_p": 0.9
-                }
+                "keep_alive": OLLAMA_KEEP_ALIVE,
+                "options": {"num_predict": 1, "num_ctx": OLLAMA_NUM_CTX}
             }
+            response = await self.client.post(self.base_url, json=payload)
+            if response.status_code != 200:
+                logger.warning(f"Ollama warmup error: {response.status_code}")
+        except Exception as e:
+            logger.warning(f"⚠️ Préchargement Ollama impossible: {e}")
+    
+    async def _call_ollama(self, prompt: str) -> Optional[str]:
+        """Appeler Ollama (local, gratuit)"""
+        try:
+            payload = self._ollama_payload(prompt, stream=False)
             
             response = await self.client.post(self.base_url, json=payload)
             
@@ -186,27 +261,93 @@ Réponds UNIQUEMENT en JSON:
             logger.info("💡 Assurez-vous qu'Ollama tourne: ollama serve")
             return None
     
-    async def _call_openai(self, prompt: str) -> Optional[str]:
-        """Appeler OpenAI ChatGPT"""
+    async def _stream_ollama(self, prompt: str,
+                             stop: Optional[Callable[[str], bool]] = None,
+                             format: Optional[Dict] = None,
+                             num_predict: int = OLLAMA_NUM_PREDICT) -> Optional[str]:
+        """
+        Appeler Ollama en streaming
+        
+        Args:
+            prompt: Prompt à envoyer
+            stop: Appelé sur le texte reçu à chaque fin de champ (fin de ligne,
+                ou virgule en JSON) ; s'il renvoie True le flux est fermé, ce
+                qui interrompt la génération
+            format: Schéma JSON imposé à la sortie (décodage contraint)
+            num_predict: Nombre maximal de tokens générés
+        """
+        try:
+            payload = self._ollama_payload(prompt, stream=True, format=format, num_predict=num_predict)
+            text = ""
+            
+            async with self.client.stream("POST", self.base_url, json=payload) as response:
+                if response.status_code != 200:
+                    logger.error(f"Ollama error: {response.status_code}")
+                    return None
+                
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    token = chunk.get('response', '')
+                    text += token
+                    
+                    if chunk.get('done'):
+                        break
+                    if stop and ('\n' in token or ',' in token) and stop(text):
+                        break
+            
+            return text
+                
+        except Exception as e:
+            logger.error(f"❌ Erreur Ollama: {e}")
+            logger.info("💡 Assurez-vous qu'Ollama tourne: ollama serve")
+            return None
+    
+    def _openai_request(self, prompt: str, stream: bool, format: Optional[Dict] = None):
+        """
+        En-têtes et corps d'une requête chat/completions
+        
+        `format` (schéma JSON attendu) active le mode JSON : réponse toujours
+        parsable, sans texte autour
+        """
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        
+        payload = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": "Tu es un expert en trading crypto. Analyse et décide."},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.3
+        }
+        if stream:
+            payload["stream"] = True
+        if format is not None:
+            # Le mode JSON exige que les messages mentionnent « JSON »
+            payload["messages"][0]["content"] += (
+                f" Réponds uniquement en JSON (clés: {', '.join(format['required'])})."
+            )
+            payload["response_format"] = {"type": "json_object"}
+        return headers, payload
+    
+    async def _call_openai(self, prompt: str, format: Optional[Dict] = None) -> Optional[str]:
+        """
+        Appeler OpenAI ChatGPT
+        
+        Args:
+            prompt: Prompt utilisateur
+            format: Schéma JSON attendu (mode JSON)
+        """
         try:
             if not self.api_key:
                 logger.error("OpenAI API key not configured")
                 return None
             
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            payload = {
-                "model": self.model,
-                "messages": [
-                    {"role": "system", "content": "Tu es un expert en trading crypto. Analyse et décide."},
-                    {"role": "user", "content": prompt}
-                ],
-                "temperature": 0.3
-            }
-            
+            headers, payload = self._openai_request(prompt, stream=False, format=format)
             response = await self.client.post(self.base_url, headers=headers, json=payload)
             
             if response.status_code == 200:
@@ -220,6 +361,50 @@ Réponds UNIQUEMENT en JSON:
             logger.error(f"❌ Erreur OpenAI: {e}")
             return None
     
+    async def _stream_openai(self, prompt: str,
+                             stop: Optional[Callable[[str], bool]] = None,
+                             format: Optional[Dict] = None) -> Optional[str]:
+        """
+        Appeler OpenAI en streaming (Server-Sent Events)
+        
+        Args:
+            prompt: Prompt utilisateur
+            stop: Même rôle que pour _stream_ollama : fermer le flux dès que
+                le texte reçu suffit (la génération restante n'est pas facturée)
+            format: Schéma JSON attendu (mode JSON)
+        """
+        try:
+            if not self.api_key:
+                logger.error("OpenAI API key not configured")
+                return None
+            
+            headers, payload = self._openai_request(prompt, stream=True, format=format)
+            text = ""
+            
+            async with self.client.stream("POST", self.base_url, headers=headers, json=payload) as response:
+                if response.status_code != 200:
+                    logger.error(f"OpenAI error: {response.status_code}")
+                    return None
+                
+                async for line in response.aiter_lines():
+                    if not line.startswith("data: "):
+                        continue
+                    data = line[6:]
+                    if data == "[DONE]":
+                        break
+                    choices = json.loads(data).get('choices') or [{}]
+                    token = (choices[0].get('delta') or {}).get('content') or ''
+                    text += token
+                    
+                    if stop and ('\n' in token or ',' in token) and stop(text):
+                        break
+            
+            return text
+                
+        except Exception as e:
+            logger.error(f"❌ Erreur OpenAI: {e}")
+            return None
+    
     async def _call_anthropic(self, prompt: str) -> Optional[str]:
         """Appeler Anthropic Claude"""
         try:
@@ -313,6 +498,7 @@ Réponds UNIQUEMENT en JSON:
         }
     
     async def close(self):
-        """Fermer le client HTTP"""
-        await self.client.aclose()
+        """Fermer le client HTTP (sauf s'il est partagé)"""
+        if self._owns_client:
+            await self.client.aclose()
 
@@ -1,10 +1,10 @@
 """Redis client for caching and online feature store"""
-import json
-from typing import Any, Dict, Optional, List
+from typing import Any, Dict, Optional, List, Tuple
 import redis
 from loguru import logger
 
 from src.config import settings
+from src.utils import fastjson
 
 
 class RedisClient:
@@ -35,7 +35,7 @@ class RedisClient:
         """Set a key-value pair"""
         try:
             if isinstance(value, (dict, list)):
-                value = json.dumps(value)
+                value = fastjson.dumps(value)
             self.client.set(key, value, ex=expiry)
         except Exception as e:
             logger.error(f"Error setting key {key}: {e}")
@@ -46,7 +46,7 @@ class RedisClient:
             value = self.client.get(key)
             if value:
                 try:
-                    return json.loads(value)
+                    return fastjson.loads(value)
                 except:
                     return value
             return None
@@ -54,6 +54,25 @@ class RedisClient:
             logger.error(f"Error getting key {key}: {e}")
             return None
     
+    def get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        """Get several values in one round-trip (None for missing keys)"""
+        try:
+            return [fastjson.loads(value) if value is not None else None
+                    for value in self.client.mget(keys)]
+        except Exception as e:
+            logger.error(f"Error getting keys {keys}: {e}")
+            return [None] * len(keys)
+    
+    def set_many(self, mapping: Dict[str, Any], expiry: int = None):
+        """Set several JSON values in one pipeline"""
+        try:
+            pipe = self.pipeline()
+            for key, value in mapping.items():
+                pipe.set(key, fastjson.dumps(value), ex=expiry)
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Error setting keys {list(mapping)}: {e}")
+    
     def delete(self, key: str):
         """Delete a key"""
         try:
@@ -73,7 +92,7 @@ class RedisClient:
         """Set hash fields"""
         try:
             # Convert dict values to JSON strings
-            json_mapping = {k: json.dumps(v) if isinstance(v, (dict, list)) else str(v) 
+            json_mapping = {k: fastjson.dumps(v) if isinstance(v, (dict, list)) else str(v) 
                            for k, v in mapping.items()}
             self.client.hset(name, mapping=json_mapping)
         except Exception as e:
@@ -85,7 +104,7 @@ class RedisClient:
             data = self.client.hgetall(name)
             # Try to parse JSON values
             return {
-                k: json.loads(v) if v.startswith('{') or v.startswith('[') else v
+                k: fastjson.loads(v) if v.startswith('{') or v.startswith('[') else v
                 for k, v in data.items()
             }
         except Exception as e:
@@ -125,6 +144,60 @@ class RedisClient:
             positions[symbol] = self.get_position(symbol)
         return positions
     
+    def pipeline(self, transaction: bool = False):
+        """Batch several commands into a single round-trip"""
+        return self.client.pipeline(transaction=transaction)
+    
+    def save_trading_state(self, capital: float, positions: Dict[str, Optional[Dict]] = None,
+                           trades: Optional[List[Dict]] = None, trade_log_size: int = 1000):
+        """
+        Persist capital, position changes and new trades in one pipeline
+        
+        The pipeline runs as a MULTI/EXEC transaction so readers never see the
+        new capital without the matching position (same single round-trip).
+        
+        Args:
+            capital: Available capital
+            positions: {symbol: position} to store, or {symbol: None} to remove
+            trades: Orders to append to the trade log (oldest first)
+            trade_log_size: Number of trades kept in the log
+        """
+        try:
+            pipe = self.pipeline(transaction=True)
+            pipe.set("current_capital", capital)
+            for symbol, position in (positions or {}).items():
+                if position is None:
+                    pipe.hdel("positions", symbol)
+                else:
+                    pipe.hset("positions", symbol, fastjson.dumps(position))
+            if trades:
+                pipe.lpush("trade_log", *(fastjson.dumps(trade, default=str) for trade in trades))
+                pipe.ltrim("trade_log", 0, trade_log_size - 1)
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Error saving trading state: {e}")
+    
+    def load_trading_state(self) -> Optional[Tuple[float, Dict[str, Dict]]]:
+        """
+        Read back what save_trading_state wrote
+        
+        Returns:
+            (capital, {symbol: position}), or None if no state was saved
+        """
+        try:
+            pipe = self.pipeline()
+            pipe.get("current_capital")
+            pipe.hgetall("positions")
+            capital, positions = pipe.execute()
+            if capital is None:
+                return None
+            return float(capital), {
+                symbol: fastjson.loads(position) for symbol, position in positions.items()
+            }
+        except Exception as e:
+            logger.error(f"Error loading trading state: {e}")
+            return None
+    
     def acquire_lock(self, lock_name: str, timeout: int = 10) -> bool:
         """Acquire distributed lock"""
         try:
@@ -141,7 +214,7 @@ class RedisClient:
         """Publish message to channel"""
         try:
             if isinstance(message, (dict, list)):
-                message = json.dumps(message)
+                message = fastjson.dumps(message)
             self.client.publish(channel, message)
         except Exception as e:
             logger.error(f"Error publishing to {channel}: {e}")
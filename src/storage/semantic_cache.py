@@ -0,0 +1,130 @@
+"""Semantic cache for LLM analyses (embedding similarity over Redis)"""
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from loguru import logger
+
+from src.storage.redis_client import RedisClient
+from src.utils import fastjson
+
+
+class SemanticLLMCache:
+    """
+    Reuse an LLM analysis when the news context is semantically close to a recent one
+
+    Entries are stored per symbol in a short Redis list (context, embedding, result).
+    A lookup only considers entries with the exact same context (model, prompt version,
+    price bucket, position) and returns the closest one above the cosine threshold.
+
+    Redis is only read the first time a symbol is looked up: the entries are then
+    mirrored in memory, with their embeddings stacked in one contiguous float32
+    matrix so that a lookup is a single matrix-vector product.
+    """
+
+    def __init__(self,
+                 redis_client: RedisClient,
+                 embed: Callable[[str], Awaitable[Optional[List[float]]]],
+                 threshold: float = 0.95,
+                 ttl: int = 600,
+                 max_entries: int = 32):
+        """
+        Args:
+            redis_client: Initialized Redis client
+            embed: Coroutine returning the embedding of a text (None on failure)
+            threshold: Minimum cosine similarity for a hit
+            ttl: Entry lifetime in seconds
+            max_entries: Entries kept per symbol
+        """
+        self.redis_client = redis_client
+        self.embed = embed
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # In-memory mirror per symbol, newest first: (context, ts, result) + embedding rows
+        self._entries: Dict[str, List[Tuple[str, float, Dict]]] = {}
+        self._matrices: Dict[str, np.ndarray] = {}
+
+    @staticmethod
+    def _key(symbol: str) -> str:
+        return f"llmcache:{symbol}"
+
+    def _load(self, symbol: str):
+        """Mirror the symbol's Redis entries in memory (first use only)"""
+        if symbol in self._entries:
+            return
+        try:
+            raw_entries = self.redis_client.client.lrange(self._key(symbol), 0, -1)
+        except Exception as e:
+            logger.error(f"Error reading semantic cache for {symbol}: {e}")
+            raw_entries = []
+
+        entries = [fastjson.loads(raw) for raw in raw_entries]
+        self._entries[symbol] = [(e['context'], e['ts'], e['result']) for e in entries]
+        if entries:
+            self._matrices[symbol] = np.asarray([e['embedding'] for e in entries], dtype=np.float32)
+        else:
+            self._matrices[symbol] = np.empty((0, 0), dtype=np.float32)
+
+    async def lookup(self, symbol: str, context: str,
+                     text: str) -> Tuple[Optional[Dict], Optional[np.ndarray]]:
+        """
+        Find a cached result for `text` under `context`
+
+        Returns:
+            (result or None, normalized query embedding or None)
+        """
+        embedding = await self.embed(text)
+        if not embedding:
+            return None, None
+        query = np.asarray(embedding, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+
+        self._load(symbol)
+        entries = self._entries[symbol]
+        matrix = self._matrices[symbol]
+        if not entries or matrix.shape[1] != query.shape[0]:
+            return None, query
+
+        now = time.time()
+        valid = np.fromiter(
+            (c == context and now - ts < self.ttl for c, ts, _ in entries),
+            dtype=bool, count=len(entries)
+        )
+        if not valid.any():
+            return None, query
+
+        # Stored embeddings are already normalized: cosine = dot product
+        similarities = matrix @ query
+        similarities[~valid] = -np.inf
+        best = int(np.argmax(similarities))
+        if similarities[best] >= self.threshold:
+            return entries[best][2], query
+        return None, query
+
+    def store(self, symbol: str, context: str, embedding: np.ndarray, result: Dict):
+        """Add a result to the symbol's cache"""
+        self._load(symbol)
+        now = time.time()
+        matrix = self._matrices[symbol]
+        if matrix.shape[1] != embedding.shape[0]:
+            # Empty mirror, or embedding model changed: start a new matrix
+            matrix = np.empty((0, embedding.shape[0]), dtype=np.float32)
+            self._entries[symbol] = []
+        self._entries[symbol] = [(context, now, result)] + self._entries[symbol][:self.max_entries - 1]
+        self._matrices[symbol] = np.vstack([embedding[None, :], matrix[:self.max_entries - 1]])
+
+        entry = {
+            'context': context,
+            'embedding': embedding.tolist(),
+            'result': result,
+            'ts': now,
+        }
+        try:
+            key = self._key(symbol)
+            pipe = self.redis_client.pipeline()
+            pipe.lpush(key, fastjson.dumps(entry))
+            pipe.ltrim(key, 0, self.max_entries - 1)
+            pipe.expire(key, self.ttl)
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Error writing semantic cache for {symbol}: {e}")
@@ -21,6 +21,14 @@ class AutonomousTrader:
     - Gère son propre portfolio
     """
     
+    # Liste de toutes les cryptos principales disponibles en EUR sur Kraken
+    UNIVERSE = (
+        'BTC/EUR', 'ETH/EUR', 'SOL/EUR', 'XRP/EUR', 'ADA/EUR',
+        'DOT/EUR', 'AVAX/EUR', 'ATOM/EUR', 'LINK/EUR', 'MATIC/EUR',
+        'UNI/EUR', 'LTC/EUR', 'BCH/EUR', 'ALGO/EUR', 'FIL/EUR',
+        'AAVE/EUR', 'GRT/EUR', 'SAND/EUR', 'MANA/EUR', 'CRV/EUR'
+    )
+    
     def __init__(self, market_data, news_ingestion, sentiment_analyzer, ai_generator):
         self.market_data = market_data
         self.news_ingestion = news_ingestion
@@ -52,16 +60,8 @@ class AutonomousTrader:
         try:
             logger.info("🔍 Scan complet du marché...")
             
-            # Liste de toutes les cryptos principales disponibles en EUR sur Kraken
-            all_cryptos = [
-                'BTC/EUR', 'ETH/EUR', 'SOL/EUR', 'XRP/EUR', 'ADA/EUR',
-                'DOT/EUR', 'AVAX/EUR', 'ATOM/EUR', 'LINK/EUR', 'MATIC/EUR',
-                'UNI/EUR', 'LTC/EUR', 'BCH/EUR', 'ALGO/EUR', 'FIL/EUR',
-                'AAVE/EUR', 'GRT/EUR', 'SAND/EUR', 'MANA/EUR', 'CRV/EUR'
-            ]
-            
             # Récupérer les tickers pour toutes
-            tickers = await self.market_data.fetch_multiple_tickers(all_cryptos)
+            tickers = await self.market_data.fetch_multiple_tickers(list(self.UNIVERSE))
             
             opportunities = []
             
@@ -0,0 +1,55 @@
+"""
+Sérialisation JSON rapide
+orjson reste optionnel : sans lui, repli sur le module json standard
+"""
+import json
+import os
+from pathlib import Path
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+    JSONDecodeError = orjson.JSONDecodeError
+except ImportError:  # pragma: no cover - dépend de l'environnement
+    orjson = None
+    ORJSON_AVAILABLE = False
+    JSONDecodeError = json.JSONDecodeError
+
+
+def dumps(obj, default=None, indent: bool = False) -> str:
+    """
+    Équivalent compact de json.dumps (toujours une str)
+
+    Les clés non-str sont acceptées comme avec json (OPT_NON_STR_KEYS).
+    `indent` produit une sortie lisible (2 espaces), pour les fichiers.
+    """
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, default=default, option=option).decode()
+    return json.dumps(obj, default=default, ensure_ascii=False, indent=2 if indent else None)
+
+
+def loads(data):
+    """Équivalent de json.loads (str ou bytes)"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def write_file(path: Path, obj, indent: bool = True):
+    """
+    Écrire `obj` en JSON dans `path` (bloquant : via asyncio.to_thread en async)
+
+    Fichier temporaire puis os.replace (atomique) : un arrêt en cours
+    d'écriture laisse l'ancienne version intacte, jamais un fichier tronqué.
+    Le temporaire est supprimé si l'écriture échoue.
+    """
+    path = Path(path)
+    tmp = path.with_name(path.name + '.tmp')
+    try:
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(dumps(obj, indent=indent))
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
@@ -0,0 +1,29 @@
+"""
+Numba compatibility layer
+Numba reste optionnel : sans lui, les kernels @njit tournent en Python pur
+"""
+try:
+    from numba import njit as _numba_njit
+    NUMBA_AVAILABLE = True
+except ImportError:  # pragma: no cover - dépend de l'environnement
+    _numba_njit = None
+    NUMBA_AVAILABLE = False
+
+
+def njit(*args, **kwargs):
+    """
+    Équivalent de numba.njit, no-op si numba n'est pas installé
+
+    Supporte `@njit`, `@njit(cache=True)` et `@njit('signature', ...)`.
+    """
+    if NUMBA_AVAILABLE:
+        return _numba_njit(*args, **kwargs)
+
+    # Utilisé directement comme décorateur : @njit
+    if len(args) == 1 and callable(args[0]) and not kwargs:
+        return args[0]
+
+    def decorator(func):
+        return func
+
+    return decorator
@@ -0,0 +1,93 @@
+"""Tests for the backtest kernels (scripts/backtest_simple.py)"""
+import importlib
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+
+
+@pytest.fixture(scope='module')
+def backtest_simple():
+    """The module imported without its numba warmup (kernels compiled on first call)"""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv('BACKTEST_NUMBA_WARMUP', '0')
+        return importlib.import_module('backtest_simple')
+
+
+def pandas_indicators(close: pd.Series) -> dict:
+    """Reference pandas definitions the fused kernel replaces"""
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    macd = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+    returns = close.pct_change()
+    return {
+        'sma_20': close.rolling(window=20).mean(),
+        'sma_50': close.rolling(window=50).mean(),
+        'rsi': 100 - (100 / (1 + gain / loss)),
+        'macd': macd,
+        'signal': macd.ewm(span=9, adjust=False).mean(),
+        'returns': returns,
+        'volatility': returns.rolling(window=20).std(),
+    }
+
+
+@pytest.fixture
+def close_series():
+    """Fixed random walk with leading NaNs"""
+    rng = np.random.default_rng(42)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 500)))
+    close[:5] = np.nan
+    return pd.Series(close)
+
+
+def test_fused_indicators_match_pandas(backtest_simple, close_series):
+    """Every output of the fused kernel matches the pandas reference, NaNs included"""
+    names = ('sma_20', 'sma_50', 'rsi', 'macd', 'signal', 'returns', 'volatility')
+    outputs = dict(zip(names, backtest_simple._fused_indicators(close_series.to_numpy())))
+    expected = pandas_indicators(close_series)
+
+    for name in names:
+        np.testing.assert_allclose(
+            outputs[name], expected[name].to_numpy(), rtol=1e-7, atol=1e-9, err_msg=name
+        )
+
+
+def test_fused_indicators_empty(backtest_simple):
+    """An empty series returns empty outputs"""
+    assert all(len(output) == 0 for output in backtest_simple._fused_indicators(np.empty(0)))
+
+
+def test_backtest_strategy_pinned(backtest_simple):
+    """Fees, equity and trade count on a small fixed path"""
+    index = pd.RangeIndex(7)
+    df = pd.DataFrame({'close': [100.0, 101.0, 102.0, 100.0, 99.0, 98.0, 98.0]}, index=index)
+    signals = pd.DataFrame({'position': [0.0, 0.0, 1.0, 1.0, -1.0, -1.0, 0.0]}, index=index)
+    commission = 0.001
+
+    results = backtest_simple.backtest_strategy(df, signals, initial_capital=10000, commission=commission)
+
+    # Position changes only: the first bar is not a trade (the former pandas
+    # count, (diff() != 0).sum(), also counted its NaN diff and gave 4)
+    assert results['num_trades'] == 3
+
+    returns = df['close'].pct_change()
+    position = signals['position']
+    strategy_returns = position.shift(1) * returns - position.diff().abs() * commission
+    final_equity = 10000 * (1 + strategy_returns).prod()
+    assert results['final_equity'] == pytest.approx(final_equity)
+    assert results['total_return'] == pytest.approx((final_equity / 10000 - 1) * 100)
+    assert results['positions'] is None
+
+
+def test_warmup_failure_is_not_fatal(backtest_simple, monkeypatch):
+    """A kernel that fails to compile during warmup is logged, not raised"""
+    def broken(*args):
+        raise TypeError("cannot determine Numba type")
+
+    monkeypatch.setattr(backtest_simple, '_fused_indicators', broken)
+    backtest_simple._warmup_kernels()
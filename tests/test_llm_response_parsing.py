@@ -0,0 +1,139 @@
+"""Tests for the LLM answer parsing of scripts/bot_intelligent.py"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# The bot imports the exchange layer (ccxt) at module level
+pytest.importorskip('ccxt')
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+
+from bot_intelligent import IntelligentTradingBot, _analysis_from_fields, _decision_complete, _iter_fields
+
+
+def test_iter_fields_markdown():
+    """Bold / list markdown around the field names and values is ignored"""
+    response = (
+        "Voici mon analyse :\n"
+        "**DÉCISION:** ACHETER\n"
+        "- **CONFIANCE**: 80%\n"
+        "* TAILLE: 30%\n"
+        "RAISON: cassure de résistance\n"
+    )
+    assert dict(_iter_fields(response)) == {
+        'DECISION': 'ACHETER',
+        'CONFIANCE': '80%',
+        'TAILLE': '30%',
+        'RAISON': 'cassure de résistance',
+    }
+
+
+def test_iter_fields_json_in_code_fence():
+    """A JSON answer wrapped in a markdown code fence is read line by line"""
+    response = '```json\n{\n  "DÉCISION": "VENDRE",\n  "CONFIANCE": 75,\n  "RAISON": "RSI > 80"\n}\n```'
+    assert dict(_iter_fields(response)) == {
+        'DECISION': 'VENDRE',
+        'CONFIANCE': '75',
+        'RAISON': 'RSI > 80',
+    }
+
+
+def test_iter_fields_json():
+    """Constrained JSON answers, keys folded to ASCII"""
+    response = '{"DÉCISION": "ATTENDRE", "CONFIANCE": 40, "TAILLE": 0, "RAISON": "range"}'
+    assert dict(_iter_fields(response)) == {
+        'DECISION': 'ATTENDRE',
+        'CONFIANCE': '40',
+        'TAILLE': '0',
+        'RAISON': 'range',
+    }
+
+
+def test_iter_fields_truncated_json():
+    """An interrupted JSON stream yields only the complete fields"""
+    response = '{"DÉCISION": "ACHETER", "CONFIANCE": 85, "RAISON": "volume en hau'
+    assert dict(_iter_fields(response)) == {'DECISION': 'ACHETER', 'CONFIANCE': '85'}
+
+    # A number is complete only once its separator has arrived
+    assert dict(_iter_fields('{"DÉCISION": "ACHETER", "CONFIANCE": 8')) == {'DECISION': 'ACHETER'}
+
+
+@pytest.mark.parametrize('text, complete', [
+    # Free text: only finished lines count
+    ("DÉCISION: ACHETER\nCONFIANCE: 80%\nRAISON: ok\n", True),
+    ("DÉCISION: ACHETER\nCONFIANCE: 80%\nRAIS", False),
+    ("**DÉCISION:** ATTENDRE\n**CONFIANCE:** 30%\n", True),
+    ("DÉCISION: ATTENDRE\nCONFIANCE: 3", False),
+    # JSON: complete fields only
+    ('{"DÉCISION": "ATTENDRE", "CONFIANCE": 30,', True),
+    ('{"DÉCISION": "ACHETER", "CONFIANCE": 80,', False),
+    ('{"DÉCISION": "ACHETER", "CONFIANCE": 80, "TAILLE": 20, "RAISON": "ok"}', True),
+])
+def test_decision_complete(text, complete):
+    """Streaming stops once the decision can no longer change"""
+    assert _decision_complete(text) is complete
+
+
+@pytest.mark.parametrize('response', ['', 'Le marché est incertain, difficile à dire.', '{"CONFIANCE": 80}'])
+def test_analysis_without_decision(response):
+    """No DÉCISION field read: no analysis (never cached as a real HOLD)"""
+    assert _analysis_from_fields(_iter_fields(response), response) is None
+
+
+def test_analysis_from_fields():
+    """Parsed fields map to the bot's analysis format"""
+    response = "DÉCISION: ACHETER\nCONFIANCE: 80%\nTAILLE: 30%\nRAISON: cassure\n"
+    result = _analysis_from_fields(_iter_fields(response), response)
+    assert result == {
+        'decision': 'BUY',
+        'confidence': 80,
+        'position_size': 0.3,
+        'explanation': 'cassure',
+        'raw_response': response,
+    }
+
+
+class FakeRedis:
+    """Dict-backed stand-in for RedisClient get/set"""
+
+    def __init__(self):
+        self.store = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def set(self, key, value, expiry=None):
+        self.store[key] = value
+
+
+class FakeLLM:
+    model = 'test-model'
+
+
+@pytest.mark.asyncio
+async def test_unparsed_reply_is_not_recorded():
+    """A garbage reply feeds neither the caches nor the stale-HOLD gate"""
+    bot = IntelligentTradingBot()
+    bot.redis_client = FakeRedis()
+    bot.llm_analyzer = FakeLLM()
+    replies = ["", '{"DÉCISION": "ACHETER", "CONFIANCE": 80, "TAILLE": 20, "RAISON": "ok"}']
+    calls = []
+
+    async def llm_call(prompt, schema, stop, num_predict):
+        calls.append(prompt)
+        return replies[len(calls) - 1]
+
+    bot._llm_call = llm_call
+    news = [{'title': 'ETF approved'}]
+
+    result = await bot.analyze_crypto_with_llm('BTC/EUR', 50000.0, news)
+    assert (result['decision'], result['confidence']) == ('HOLD', 0)
+    assert bot._last_analysis == {} and bot._last_decision == {}
+    assert bot.redis_client.store == {}
+
+    # Same inputs: analysed again instead of a direct HOLD
+    result = await bot.analyze_crypto_with_llm('BTC/EUR', 50000.0, news)
+    assert len(calls) == 2
+    assert (result['decision'], result['confidence']) == ('BUY', 80)
+    assert 'BTC/EUR' in bot._last_analysis and 'BTC/EUR' in bot._last_decision
+    await bot.http.aclose()
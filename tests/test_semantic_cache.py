@@ -0,0 +1,115 @@
+"""Tests for the semantic LLM cache"""
+from collections import defaultdict
+
+import numpy as np
+import pytest
+
+from src.storage.semantic_cache import SemanticLLMCache
+
+
+class FakePipeline:
+    """Queued list commands applied on execute()"""
+
+    def __init__(self, lists):
+        self.lists = lists
+        self.commands = []
+
+    def lpush(self, key, value):
+        self.commands.append(lambda: self.lists[key].insert(0, value))
+
+    def ltrim(self, key, start, end):
+        self.commands.append(lambda: self.lists.__setitem__(key, self.lists[key][start:end + 1]))
+
+    def expire(self, key, ttl):
+        pass
+
+    def execute(self):
+        for command in self.commands:
+            command()
+        self.commands = []
+
+
+class FakeRedis:
+    """Just enough of RedisClient for the semantic cache"""
+
+    def __init__(self):
+        self.lists = defaultdict(list)
+        self.client = self
+
+    def lrange(self, key, start, end):
+        return list(self.lists[key])
+
+    def pipeline(self, transaction=False):
+        return FakePipeline(self.lists)
+
+
+EMBEDDINGS = {
+    'etf approved': [1.0, 0.0, 0.0],
+    'etf approval confirmed': [0.99, 0.1, 0.0],
+    'exchange hacked': [0.0, 1.0, 0.0],
+}
+
+
+async def embed(text):
+    return EMBEDDINGS.get(text)
+
+
+@pytest.fixture
+def fake_redis():
+    return FakeRedis()
+
+
+def make_cache(redis_client):
+    return SemanticLLMCache(redis_client, embed, threshold=0.95)
+
+
+async def store(cache, symbol, context, text, result):
+    """Embed `text` the way lookup does, then store it"""
+    _, query = await cache.lookup(symbol, context, text)
+    cache.store(symbol, context, query, result)
+
+
+@pytest.mark.asyncio
+async def test_lookup_threshold(fake_redis):
+    """Close news hit, distant news and other contexts miss"""
+    cache = make_cache(fake_redis)
+    await store(cache, 'BTC/EUR', 'ctx', 'etf approved', {'action': 'BUY'})
+
+    result, query = await cache.lookup('BTC/EUR', 'ctx', 'etf approval confirmed')
+    assert result == {'action': 'BUY'}
+    assert np.linalg.norm(query) == pytest.approx(1.0)
+
+    result, _ = await cache.lookup('BTC/EUR', 'ctx', 'exchange hacked')
+    assert result is None
+
+    result, _ = await cache.lookup('BTC/EUR', 'other ctx', 'etf approved')
+    assert result is None
+
+
+@pytest.mark.asyncio
+async def test_symbols_are_isolated(fake_redis):
+    """An entry stored for one symbol is never returned for another"""
+    cache = make_cache(fake_redis)
+    await store(cache, 'BTC/EUR', 'ctx', 'etf approved', {'action': 'BUY'})
+
+    result, _ = await cache.lookup('ETH/EUR', 'ctx', 'etf approved')
+    assert result is None
+    assert fake_redis.lists['llmcache:ETH/EUR'] == []
+
+
+@pytest.mark.asyncio
+async def test_rebuild_from_redis(fake_redis):
+    """A new cache instance mirrors the entries already in Redis"""
+    await store(make_cache(fake_redis), 'BTC/EUR', 'ctx', 'etf approved', {'action': 'BUY'})
+    assert len(fake_redis.lists['llmcache:BTC/EUR']) == 1
+
+    cache = make_cache(fake_redis)
+    result, _ = await cache.lookup('BTC/EUR', 'ctx', 'etf approval confirmed')
+    assert result == {'action': 'BUY'}
+
+
+@pytest.mark.asyncio
+async def test_embedding_failure(fake_redis):
+    """No embedding: no lookup, no query vector"""
+    cache = make_cache(fake_redis)
+    assert await cache.lookup('BTC/EUR', 'ctx', 'unknown text') == (None, None)
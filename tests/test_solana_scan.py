@@ -0,0 +1,79 @@
+"""Tests for the scan cache of scripts/bot_solana_flip.py"""
+import sys
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+
+from bot_solana_flip import SolanaFlipBot
+
+
+class FailingLLM:
+    """LLM stand-in whose every call fails (missing key, 429, Ollama down)"""
+
+    provider = "openai"
+
+    async def _call_openai(self, prompt, format=None):
+        raise RuntimeError("429 Too Many Requests")
+
+
+class AnsweringLLM:
+    """LLM stand-in answering ATTENDRE for every token of the batch"""
+
+    provider = "openai"
+
+    async def _call_openai(self, prompt, format=None):
+        keys = format['required']
+        return '{' + ', '.join(
+            f'"{key}": {{"DÉCISION": "ATTENDRE", "CONFIANCE": 60, "RAISON": "range"}}' for key in keys
+        ) + '}'
+
+
+def make_token(i):
+    return {
+        'symbol': f'TOK{i}',
+        'address': f'addr{i}',
+        'price_usd': 1.0 + i,
+        'volume_24h': 100000.0,
+        'liquidity_usd': 50000.0,
+    }
+
+
+@pytest_asyncio.fixture
+async def bot(tmp_path):
+    bot = SolanaFlipBot()
+    bot.scan_cache_file = tmp_path / "scan_cache.json"
+    yield bot
+    await bot.http.aclose()
+
+
+@pytest.mark.asyncio
+async def test_failed_analysis_is_not_remembered(bot):
+    """Tokens whose analysis failed come back on the next scan"""
+    top = [make_token(i) for i in range(3)]
+    bot.llm = FailingLLM()
+    bot._empty_streak = 2
+
+    analyses = await bot._analyze_scan(top)
+
+    assert all(analysis['failed'] for analysis in analyses)
+    assert bot._scan_delta(top) == top
+    assert bot._empty_streak == 2
+    assert not bot.scan_cache_file.exists()
+
+
+@pytest.mark.asyncio
+async def test_answered_analysis_is_remembered(bot):
+    """Tokens with a real LLM answer are hidden until they move"""
+    top = [make_token(i) for i in range(3)]
+    bot.llm = AnsweringLLM()
+    bot._empty_streak = 2
+
+    analyses = await bot._analyze_scan(top)
+
+    assert [analysis['decision'] for analysis in analyses] == ['HOLD'] * 3
+    assert not any(analysis.get('failed') for analysis in analyses)
+    assert bot._scan_delta(top) == []
+    assert bot._empty_streak == 0